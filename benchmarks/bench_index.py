@@ -0,0 +1,57 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.index import TransactionIndex
+from src.reports import spending_by_category
+from src.utils import normalize_transactions
+
+CATEGORIES = ["Супермаркеты", "Фастфуд", "Транспорт", "Переводы", "Развлечения", "Аптеки", "Такси", "Дом и ремонт"]
+
+
+def make_transactions(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Генерирует нормализованный DataFrame транзакций за пять лет."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2018-01-01T00:00:00")
+    seconds = rng.integers(0, 5 * 365 * 24 * 3600, rows)
+    return normalize_transactions(
+        pd.DataFrame(
+            {
+                "Дата операции": start + seconds.astype("timedelta64[s]"),
+                "Категория": rng.choice(CATEGORIES, rows),
+                "Сумма операции": np.round(rng.normal(-500, 800, rows), 2),
+            }
+        )
+    )
+
+
+def main(rows: int = 1_000_000) -> None:
+    """Выводит время ответа на пакет запросов полным просмотром и через индекс."""
+    df = make_transactions(rows)
+    dates = pd.date_range("2019-01-01", "2022-12-31", periods=25).strftime("%d.%m.%Y")
+    queries = [(category, date) for category in CATEGORIES for date in dates]
+
+    started = time.perf_counter()
+    index = TransactionIndex(df)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for category, date in queries:
+        spending_by_category.__wrapped__(df, category, date)
+    scan_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index.spending_batch(queries)
+    index_time = time.perf_counter() - started
+
+    print(f"Строк: {rows}, запросов: {len(queries)}")
+    print(f"Построение индекса: {build_time:.3f} с")
+    print(f"Полный просмотр:    {scan_time:.3f} с ({scan_time / len(queries) * 1000:.2f} мс на запрос)")
+    print(f"Индекс:             {index_time:.3f} с ({index_time / len(queries) * 1000:.2f} мс на запрос)")
+    print(f"Ускорение:          x{scan_time / index_time:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
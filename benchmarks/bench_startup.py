@@ -0,0 +1,54 @@
+import subprocess
+import sys
+import time
+
+PROMPT = "Ваш выбор: "
+
+
+def time_to_prompt(runs: int = 5) -> float:
+    """Среднее время от запуска main.py до появления меню (секунды)."""
+    total = 0.0
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "main.py"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+        )
+        output = ""
+        while not output.endswith(PROMPT):
+            char = process.stdout.read(1)
+            if not char:
+                break
+            output += char
+        total += time.perf_counter() - started
+        process.communicate("0\n")
+    return total / runs
+
+
+def import_profile(module: str = "main", top: int = 10) -> list:
+    """Самые долгие импорты модуля по данным python -X importtime (микросекунды, накопительно)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    """Выводит время до первого приглашения меню и профиль импорта main.py."""
+    print(f"Время до меню: {time_to_prompt() * 1000:.0f} мс")
+    print("Профиль импорта main.py (накопительно):")
+    for cumulative, name in import_profile():
+        print(f"  {cumulative / 1000:8.1f} мс  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+from benchmarks.datasets import generate_transactions, synthetic_dataset
+from src.reports import spending_by_category
+from src.services import find_p2p_transfers
+from src.utils import file_reader, normalize_transactions
+from src.views import get_card_summary, get_top_transactions, home_page
+
+TIERS = {"small": 10_000, "medium": 100_000, "large": 1_000_000}
+
+BASELINE_PATH = "benchmarks/baseline.json"
+
+# Чтение EXCEL на миллионе строк занимает минуты, поэтому по умолчанию оно замеряется только до этого размера
+XLSX_MAX_ROWS = 100_000
+
+TOLERANCE = 0.25
+
+# Изменения меньше этих величин считаются шумом измерений
+MIN_DELTA = {"seconds": 0.005, "peak_mb": 1.0}
+
+BENCH_DATE = "31.12.2021"
+
+
+def measure(func: callable, repeats: int = 3) -> dict:
+    """
+    Замеряет функцию: лучшее время из repeats запусков и пиковую память отдельного запуска под tracemalloc.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_mb": round(peak / 2**20, 3)}
+
+
+def cases(rows: int) -> dict:
+    """Возвращает замеряемые функции для набора данных из rows строк: имя -> функция без аргументов."""
+    raw = generate_transactions(rows)
+    df = normalize_transactions(raw)
+    pkl_path = synthetic_dataset(rows, "pkl")
+    result = {
+        "file_reader_pkl": lambda: file_reader(pkl_path),
+        "normalize_transactions": lambda: normalize_transactions(raw),
+        "get_card_summary": lambda: get_card_summary(df),
+        "get_top_transactions": lambda: get_top_transactions(df),
+        "home_page": lambda: home_page(df),
+        "find_p2p_transfers": lambda: find_p2p_transfers(df),
+        "spending_by_category": lambda: spending_by_category.__wrapped__(df, "Супермаркеты", BENCH_DATE),
+    }
+    if rows <= XLSX_MAX_ROWS:
+        path = synthetic_dataset(rows, "xlsx")
+        result["file_reader_xlsx"] = lambda: file_reader(path)
+    return result
+
+
+def run(tiers: list, repeats: int = 3) -> dict:
+    """
+    Запускает все замеры для перечисленных уровней размера.
+    Курсы валют и акций подменяются пустыми списками, чтобы home_page не обращалась к сети.
+
+    :return: Словарь уровень -> функция -> {"seconds", "peak_mb", "rows"}.
+    """
+    results = {}
+    with mock.patch("src.views.get_market_data", return_value=([], [])):
+        for tier in tiers:
+            rows = TIERS[tier]
+            results[tier] = {}
+            for name, func in cases(rows).items():
+                result = results[tier][name] = {**measure(func, repeats), "rows": rows}
+                print(f"{tier:>6} {name:<24} {result['seconds']:>9.4f} с {result['peak_mb']:>9.1f} МБ")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """
+    Сравнивает результаты с базовыми и возвращает список регрессий:
+    время или пиковая память выросли больше чем в (1 + tolerance) раз и больше чем на MIN_DELTA.
+    """
+    regressions = []
+    for tier, functions in results.items():
+        for name, current in functions.items():
+            previous = baseline.get(tier, {}).get(name)
+            if not previous:
+                continue
+            for metric in ("seconds", "peak_mb"):
+                limit = max(previous[metric] * (1 + tolerance), previous[metric] + MIN_DELTA[metric])
+                if previous[metric] > 0 and current[metric] > limit:
+                    regressions.append(
+                        {
+                            "tier": tier,
+                            "function": name,
+                            "metric": metric,
+                            "baseline": previous[metric],
+                            "current": current[metric],
+                            "ratio": round(current[metric] / previous[metric], 2),
+                        }
+                    )
+    return regressions
+
+
+def main(argv: list | None = None) -> int:
+    """Точка входа: замеры, сравнение с базовыми результатами и сохранение новых базовых."""
+    parser = argparse.ArgumentParser(description="Бенчмарки основных функций на синтетических данных")
+    parser.add_argument("--tiers", default="small,medium", help=f"Уровни размера через запятую: {', '.join(TIERS)}")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результаты как базовые")
+    args = parser.parse_args(argv)
+
+    results = run(args.tiers.split(","), args.repeats)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, ensure_ascii=False, indent=2)
+        print(f"Базовые результаты сохранены в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Нет базовых результатов ({args.baseline}), запустите с --save-baseline")
+        return 0
+    with open(args.baseline, encoding="utf-8") as file:
+        regressions = compare(results, json.load(file), args.tolerance)
+    for item in regressions:
+        print(
+            f"РЕГРЕССИЯ {item['tier']} {item['function']} {item['metric']}: "
+            f"{item['baseline']} -> {item['current']} (x{item['ratio']})"
+        )
+    if not regressions:
+        print("Регрессий нет")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
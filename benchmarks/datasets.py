@@ -0,0 +1,189 @@
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from src.utils import normalize_transactions
+
+SYNTHETIC_DIR = "data/synthetic"
+
+COLUMNS = [
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+]
+
+# Категория -> (доля операций, MCC, типичная сумма трат, описания), по мотивам data/operations.xlsx
+MERCHANTS = {
+    "Супермаркеты": (0.34, 5411, 250, ["Колхоз", "Магнит", "SPAR", "Дикси", "Перекрёсток", "Лента"]),
+    "Фастфуд": (0.19, 5814, 200, ["McDonald's", "Бургер Кинг", "Rumyanyj Khleb", "Kofe s sobojj", "KFC"]),
+    "Транспорт": (0.06, 4121, 300, ["Яндекс Такси", "Ситимобил", "Uber"]),
+    "Ж/д билеты": (0.04, 4112, 1500, ["РЖД"]),
+    "Различные товары": (0.03, 5399, 900, ["Ozon.ru", "Wildberries", "AliExpress"]),
+    "Связь": (0.03, 4814, 400, ["МТС", "Билайн", "Мегафон"]),
+    "Аптеки": (0.02, 5912, 500, ["Apteka 7", "Аптека Вита", "Ригла"]),
+    "Каршеринг": (0.02, 7512, 400, ["Ситидрайв", "Делимобиль"]),
+    "Рестораны": (0.02, 5812, 1500, ["OOO Frittella", "Pingvin Kofe I Chaj", "Mouse Tail"]),
+    "Местный транспорт": (0.02, 4111, 60, ["Метро Санкт-Петербург"]),
+    "Дом и ремонт": (0.015, 5200, 2000, ["Леруа Мерлен", "OBI"]),
+    "Топливо": (0.015, 5541, 2000, ["Circle K", "Лукойл", "Газпромнефть"]),
+    "Одежда и обувь": (0.01, 5651, 3000, ["Uniqlo", "Спортмастер"]),
+    "Развлечения": (0.01, 7832, 700, ["Кинотеатр Мираж", "Яндекс Афиша"]),
+    "Наличные": (0.015, 6011, 5000, ["Снятие в банкомате Сбербанк"]),
+    "Пополнения": (0.03, np.nan, -10000, ["Пополнение через Сбербанк Онлайн", "Внесение наличных"]),
+    "Бонусы": (0.015, np.nan, -100, ["Кешбэк за обычные покупки"]),
+}
+
+TRANSFER_DESCRIPTIONS = ["Перевод с карты", "Перевод Кредитная карта. ТП 10.2 RUR"]
+
+FIRST_NAMES = ["Иван", "Сергей", "Анна", "Мария", "Дмитрий", "Ольга", "Константин", "Валерия", "Михаил", "Елена"]
+
+CURRENCIES = {"RUB": 0.98, "TRY": 0.01, "EUR": 0.005, "CNY": 0.003, "USD": 0.002}
+
+CARDS = {"*7197": 0.72, "*4556": 0.17, "*5091": 0.05, "*5441": 0.03, "*1112": 0.03}
+
+
+def generate_transactions(
+    rows: int,
+    seed: int = 42,
+    start: str = "2018-01-01",
+    days: int = 4 * 365,
+    cards: Optional[dict] = None,
+    currencies: Optional[dict] = None,
+    transfer_share: float = 0.05,
+    p2p_share: float = 0.5,
+    failed_share: float = 0.006,
+    amount_sigma: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Генерирует DataFrame транзакций в формате выгрузки банка (как после pd.read_excel).
+
+    :param rows: Количество строк.
+    :param seed: Зерно генератора случайных чисел.
+    :param start: Дата первой операции в формате 'YYYY-MM-DD'.
+    :param days: Длина периода в днях. Операции отсортированы по убыванию даты, как в выгрузке.
+    :param cards: Словарь номер карты -> доля операций. По умолчанию CARDS.
+    :param currencies: Словарь валюта -> доля операций. По умолчанию CURRENCIES.
+    :param transfer_share: Доля переводов (категория 'Переводы').
+    :param p2p_share: Доля переводов физическим лицам среди переводов.
+    :param failed_share: Доля операций со статусом FAILED.
+    :param amount_sigma: Разброс сумм (сигма логнормального распределения).
+    :return: DataFrame с колонками COLUMNS.
+    """
+    rng = np.random.default_rng(seed)
+    cards = cards or CARDS
+    currencies = currencies or CURRENCIES
+
+    seconds = np.sort(rng.integers(0, days * 24 * 3600, rows))[::-1]
+    day_numbers, time_of_day = np.divmod(seconds, 24 * 3600)
+    # strftime по миллиону меток работает секунды, поэтому строки собираются из справочников дней и времени суток
+    day_names = pd.date_range(start, periods=days).strftime("%d.%m.%Y").to_numpy(dtype=object)[day_numbers]
+    time_names = np.array([f"{h:02d}:{m:02d}:{s:02d}" for h in range(24) for m in range(60) for s in range(60)])
+    operation_dates = day_names + " " + time_names.astype(object)[time_of_day]
+
+    names = list(MERCHANTS)
+    weights = np.array([MERCHANTS[name][0] for name in names])
+    weights = weights / weights.sum() * (1 - transfer_share)
+    category_codes = rng.choice(len(names) + 1, rows, p=np.append(weights, transfer_share))
+    categories = np.array(names + ["Переводы"], dtype=object)[category_codes]
+
+    mcc = np.array([MERCHANTS[name][1] for name in names] + [np.nan])[category_codes]
+    scale = np.array([MERCHANTS[name][2] for name in names] + [3000])[category_codes]
+    amounts = -np.round(np.abs(scale) * rng.lognormal(0, amount_sigma, rows) / np.exp(amount_sigma**2 / 2), 2)
+    amounts = np.where(scale < 0, -amounts, amounts)
+
+    description_choice = rng.random(rows)
+    descriptions = np.empty(rows, dtype=object)
+    for code, name in enumerate(names):
+        mask = category_codes == code
+        options = np.array(MERCHANTS[name][3], dtype=object)
+        descriptions[mask] = options[(description_choice[mask] * len(options)).astype(int)]
+
+    transfers = category_codes == len(names)
+    p2p = transfers & (rng.random(rows) < p2p_share)
+    people = np.array([f"{first} {letter}." for first in FIRST_NAMES for letter in "АБВГДКМПС"], dtype=object)
+    descriptions[p2p] = people[rng.integers(0, len(people), p2p.sum())]
+    other = transfers & ~p2p
+    descriptions[other] = np.array(TRANSFER_DESCRIPTIONS, dtype=object)[rng.integers(0, 2, other.sum())]
+
+    card_values = rng.choice(list(cards), rows, p=np.array(list(cards.values())) / sum(cards.values()))
+    card_values = np.where(rng.random(rows) < 0.1, None, card_values)
+    currency = rng.choice(list(currencies), rows, p=np.array(list(currencies.values())) / sum(currencies.values()))
+    status = np.where(rng.random(rows) < failed_share, "FAILED", "OK")
+    cashback = np.where((amounts < 0) & (rng.random(rows) < 0.1), np.round(-amounts / 100), np.nan)
+    bonuses = np.where(amounts < 0, np.floor(-amounts / 50), 0).astype(int)
+
+    return pd.DataFrame(
+        {
+            "Дата операции": operation_dates,
+            "Дата платежа": day_names,
+            "Номер карты": card_values,
+            "Статус": status,
+            "Сумма операции": amounts,
+            "Валюта операции": currency,
+            "Сумма платежа": amounts,
+            "Валюта платежа": currency,
+            "Кэшбэк": cashback,
+            "Категория": categories,
+            "MCC": mcc,
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": bonuses,
+            "Округление на инвесткопилку": 0,
+            "Сумма операции с округлением": np.abs(amounts),
+        },
+        columns=COLUMNS,
+    )
+
+
+def write_dataset(df: pd.DataFrame, path: str) -> str:
+    """
+    Сохраняет сгенерированные транзакции в формате, определяемом расширением файла:
+    .xlsx (как выгрузка банка), .csv, .pkl (нормализованный DataFrame для file_reader)
+    или .parquet (требуется pyarrow).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".xlsx"):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(df.columns))
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            sheet.append(row)
+        workbook.save(path)
+    elif path.endswith(".csv"):
+        df.to_csv(path, index=False)
+    elif path.endswith(".pkl"):
+        normalize_transactions(df).to_pickle(path)
+    elif path.endswith(".parquet"):
+        normalize_transactions(df).to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Неизвестный формат файла: {path}")
+    return path
+
+
+def synthetic_dataset(rows: int, fmt: str = "xlsx", seed: int = 42, directory: str = SYNTHETIC_DIR) -> str:
+    """Возвращает путь к сгенерированному файлу нужного размера, создавая его при первом обращении."""
+    path = os.path.join(directory, f"operations_{rows}_{seed}.{fmt}")
+    if not os.path.exists(path):
+        write_dataset(generate_transactions(rows, seed), path)
+    return path
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(SYNTHETIC_DIR, f"operations_{rows}.xlsx")
+    print(write_dataset(generate_transactions(rows), path))
@@ -1,7 +1,59 @@
-from src.reports import spending_by_category
-from src.services import find_p2p_transfers
-from src.utils import file_reader
-from src.views import home_page
+import argparse
+import json
+import sys
+import threading
+
+DATA_PATH = "data/operations.xlsx"
+
+
+class BackgroundLoader:
+    """
+    Загружает набор данных и модули анализа в фоновом потоке, пока пользователь выбирает действие.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.df = None
+        self.aggregates = None
+        self.index = None
+        self.error = None
+        self._thread = threading.Thread(target=self._load, daemon=True)
+        self._thread.start()
+
+    def _load(self) -> None:
+        try:
+            from src.aggregates import AGGREGATES_PATH, HomePageAggregates
+            from src.cache import cached_file_reader
+            from src.fx import convert_currency
+            from src.index import TransactionIndex
+            from src.utils import TRANSACTION_COLUMNS, normalize_transactions, restore_state
+
+            self.df = convert_currency(normalize_transactions(cached_file_reader(self.file_path, TRANSACTION_COLUMNS)))
+            self.aggregates = restore_state(HomePageAggregates, self.df, AGGREGATES_PATH)
+            self.index = TransactionIndex(self.df)
+            import src.reports  # noqa: F401
+            import src.services  # noqa: F401
+            import src.views  # noqa: F401
+        except Exception as e:
+            self.error = e
+
+    def get(self) -> any:
+        """Возвращает загруженный DataFrame, при необходимости дожидаясь окончания загрузки."""
+        if self._thread.is_alive():
+            print("Загрузка данных...")
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.df
+
+
+def _loaded_data(loader: BackgroundLoader) -> any:
+    """Возвращает загруженные данные или None, если загрузка завершилась ошибкой."""
+    try:
+        return loader.get()
+    except Exception as e:
+        print(f"Не удалось загрузить данные: {e}")
+        return None
 
 
 def main():
@@ -14,7 +66,9 @@ def main():
     2. Поиск переводов физическим лицам: выполняет поиск переводов, соответствующих определенному шаблону,
        и выводит результат в формате JSON.
     3. Отчет по категории: формирует отчет о расходах по указанной категории за последние три месяца от выбранной даты.
-    4. Выход: завершает работу программы.
+       Запрос отвечает индекс транзакций, построенный при загрузке, без полного просмотра данных.
+    4. Отчеты по всем категориям: формирует отчеты о расходах сразу по всем категориям за три месяца.
+    5. Выход: завершает работу программы.
 
     Программа работает в бесконечном цикле, предоставляя пользователю возможность выбора действий.
 
@@ -22,14 +76,17 @@ def main():
     - "1" - Вызов главной страницы.
     - "2" - Поиск переводов физическим лицам.
     - "3" - Генерация отчета по категории.
+    - "4" - Генерация отчетов по всем категориям.
     - "0" - Выход из программы.
 
     Обработка ошибок:
     - Если ввод пользователя некорректен, программа запрашивает ввод повторно.
     - В случае ошибок при обработке данных, выводится соответствующее сообщение.
+    - Если загрузка данных завершилась ошибкой, выводится сообщение и программа возвращается в меню.
+
+    Данные загружаются в фоне, меню доступно сразу; первое действие при необходимости ждет загрузки.
     """
-    file_path = "data/operations.xlsx"
-    df = file_reader(file_path)
+    loader = BackgroundLoader(DATA_PATH)
 
     while True:
         user_input = input(
@@ -37,23 +94,48 @@ def main():
             "1 - Главная страница\n"
             "2 - Найти переводы физическим лицам\n"
             "3 - Сформировать отчет по категории\n"
+            "4 - Сформировать отчеты по всем категориям\n"
             "0 - Выход\n"
             "Ваш выбор: "
         )
         if user_input == "1":
-            home = home_page(df)
+            from src.views import home_page
+
+            df = _loaded_data(loader)
+            if df is None:
+                continue
+            home = home_page(df, loader.aggregates)
             print(home if home else "Не удалось сформировать главную страницу.")
 
         elif user_input == "2":
+            from src.services import find_p2p_transfers
+
+            df = _loaded_data(loader)
+            if df is None:
+                continue
             transfers = find_p2p_transfers(df)
             print(transfers if transfers else "Переводы физ. лицам не найден.")
 
         elif user_input == "3":
             category = input("Введите категорию: ")
             date = input("Введите дату (ДД.ММ.ГГГ) или оставьте пустым для текущей даты: ")
-            report = spending_by_category(df, category, date)
+            from src.reports import save_report
+
+            if _loaded_data(loader) is None:
+                continue
+            report = save_report()(loader.index.spending_by_category)(category, date)
             print(report.to_string(index=False) if not report.empty else "Нет данных для выбранной категории")
 
+        elif user_input == "4":
+            date = input("Введите дату (ДД.ММ.ГГГ) или оставьте пустым для текущей даты: ")
+            from src.reports import spending_report_all_categories
+
+            df = _loaded_data(loader)
+            if df is None:
+                continue
+            _, totals = spending_report_all_categories(df, date)
+            print(totals.to_string() if not totals.empty else "Нет данных за выбранный период")
+
         elif user_input == "0":
             print("Выход из программы")
             break
@@ -62,5 +144,74 @@ def main():
             print("Неверный выбор. Пожалуйста, попробуйте снова.")
 
 
+def cli(argv: list | None = None) -> None:
+    """
+    Точка входа командной строки.
+
+    Без аргументов запускает интерактивное меню main().
+    Команда batch анализирует несколько выгрузок параллельно и выводит объединенный результат в JSON:
+        python main.py batch "data/*.xlsx" --date 31.12.2021 --workers 4 --output result.json
+    Команда queries выполняет запросы из JSONL-файла на одном загруженном наборе данных:
+        python main.py queries queries.jsonl --output results.jsonl --workers 4
+    Команда serve запускает локальный HTTP-сервер с отчетами:
+        python main.py serve --port 8000 --workers 8
+    Параметр --metrics включает замеры основных функций и сохраняет их при выходе:
+        python main.py --metrics logs/metrics.prom queries queries.jsonl
+    """
+    parser = argparse.ArgumentParser(description="Анализ банковских операций")
+    parser.add_argument(
+        "--metrics", default=None, help="Файл для метрик при выходе (.json - сводка, иначе формат Prometheus)"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="Параллельный анализ нескольких выгрузок")
+    batch_parser.add_argument("pattern", help="Каталог с EXCEL-файлами или glob-шаблон")
+    batch_parser.add_argument("--date", default=None, help="Дата отчета по категориям (ДД.ММ.ГГГГ)")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Количество процессов")
+    batch_parser.add_argument("--output", default=None, help="Файл для результата (по умолчанию stdout)")
+
+    queries_parser = subparsers.add_parser("queries", help="Выполнение запросов из JSONL-файла")
+    queries_parser.add_argument("source", nargs="?", default=None, help="Файл запросов (по умолчанию stdin)")
+    queries_parser.add_argument("--data", default=DATA_PATH, help="Файл с операциями")
+    queries_parser.add_argument("--output", default=None, help="Файл для ответов (по умолчанию stdout)")
+    queries_parser.add_argument("--workers", type=int, default=1, help="Количество потоков")
+
+    serve_parser = subparsers.add_parser("serve", help="Локальный HTTP-сервер с отчетами")
+    serve_parser.add_argument("--data", default=DATA_PATH, help="Файл с операциями")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Адрес")
+    serve_parser.add_argument("--port", type=int, default=8000, help="Порт")
+    serve_parser.add_argument("--workers", type=int, default=8, help="Количество потоков")
+
+    args = parser.parse_args(argv)
+    if args.metrics:
+        import atexit
+
+        from src.metrics import enable_metrics, export_metrics
+
+        enable_metrics()
+        atexit.register(export_metrics, args.metrics, "json" if args.metrics.endswith(".json") else "prometheus")
+
+    if args.command == "batch":
+        from src.batch import analyze_files
+
+        result = json.dumps(analyze_files(args.pattern, args.date, args.workers), ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                file.write(result)
+        else:
+            print(result)
+    elif args.command == "queries":
+        from src.queries import Dataset, run_queries
+
+        summary = run_queries(Dataset.from_file(args.data), args.source, args.output, args.workers)
+        print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    elif args.command == "serve":
+        from src.server import serve
+
+        serve(args.data, args.host, args.port, args.workers)
+    else:
+        main()
+
+
 if __name__ == "__main__":
-    main()
+    cli()
@@ -0,0 +1,134 @@
+import heapq
+import json
+import logging
+import os
+
+import pandas as pd
+
+from src.utils import DATE_FORMAT, card_suffix
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/aggregates.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+AGGREGATES_PATH = "data/home_aggregates.json"
+TOP_K = 5
+
+
+class HomePageAggregates:
+    """
+    Инкрементально обновляемые агрегаты главной страницы.
+
+    Хранит суммы расходов по картам и ограниченную кучу топ-K транзакций по сумме.
+    Добавление новых строк стоит O(новых строк), а ответ главной страницы
+    не зависит от длины истории. Между запусками агрегаты сохраняются в файл
+    и дополняются только новыми строками (см. src.utils.restore_state).
+    """
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.card_totals: dict = {}
+        self.rows = 0
+        self.fingerprint = None
+        self._top: list = []
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, top_k: int = TOP_K) -> "HomePageAggregates":
+        """Строит агрегаты по всему DataFrame."""
+        aggregates = cls(top_k)
+        aggregates.update(df)
+        return aggregates
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Добавляет новые транзакции в агрегаты.
+        """
+        if df.empty:
+            return
+        cards = df["Номер карты"]
+        if not isinstance(cards.dtype, pd.CategoricalDtype):
+            cards = card_suffix(cards)
+        spent = df["Сумма операции"] < 0
+        part = df.loc[spent, "Сумма операции"].groupby(cards[spent], observed=True).sum()
+        for card, total in part.items():
+            self.card_totals[str(card)] = self.card_totals.get(str(card), 0.0) + float(total)
+
+        for position, row in df.reset_index(drop=True).nlargest(self.top_k, "Сумма операции").iterrows():
+            date = row["Дата операции"]
+            record = {
+                "date": date.strftime(DATE_FORMAT) if isinstance(date, pd.Timestamp) else date,
+                "amount": round(row["Сумма операции"], 2),
+                "category": row["Категория"],
+                "description": row["Описание"],
+            }
+            item = (float(row["Сумма операции"]), -(self.rows + position), record)
+            if len(self._top) < self.top_k:
+                heapq.heappush(self._top, item)
+            elif item[:2] > self._top[0][:2]:
+                heapq.heapreplace(self._top, item)
+        self.rows += len(df)
+
+    def merge(self, other: "HomePageAggregates") -> None:
+        """
+        Добавляет агрегаты, посчитанные по другой части данных (строки other идут после строк self).
+        """
+        for card, total in other.card_totals.items():
+            self.card_totals[card] = self.card_totals.get(card, 0.0) + total
+        for amount, order, record in other._top:
+            item = (amount, order - self.rows, record)
+            if len(self._top) < self.top_k:
+                heapq.heappush(self._top, item)
+            elif item[:2] > self._top[0][:2]:
+                heapq.heapreplace(self._top, item)
+        self.rows += other.rows
+
+    def card_summary(self) -> list:
+        """Сводка расходов по картам в формате get_card_summary."""
+        return [
+            {"last_digits": card, "total_spent": round(abs(total), 2), "cashback": int(abs(total) // 100)}
+            for card, total in sorted(self.card_totals.items())
+        ]
+
+    def top_transactions(self) -> list:
+        """Топ транзакций по сумме в формате get_top_transactions."""
+        return [record for *_, record in sorted(self._top, key=lambda item: (-item[0], -item[1]))]
+
+    def save(self, path: str = AGGREGATES_PATH) -> None:
+        """Сохраняет агрегаты в JSON-файл."""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            state = {
+                "top_k": self.top_k,
+                "rows": self.rows,
+                "fingerprint": self.fingerprint,
+                "card_totals": self.card_totals,
+                "top": [[amount, order, record] for amount, order, record in self._top],
+            }
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, default=str)
+            os.replace(f"{path}.tmp", path)
+            logger.info(f"Агрегаты сохранены в {path}")
+        except Exception as e:
+            logger.error(f"Ошибка сохранения агрегатов: {e}")
+
+    @classmethod
+    def load(cls, path: str = AGGREGATES_PATH) -> "HomePageAggregates | None":
+        """Загружает агрегаты из JSON-файла. Возвращает None, если файла нет или он поврежден."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            aggregates = cls(state["top_k"])
+            aggregates.rows = state["rows"]
+            aggregates.fingerprint = state.get("fingerprint")
+            aggregates.card_totals = state["card_totals"]
+            aggregates._top = [(amount, order, record) for amount, order, record in state["top"]]
+            heapq.heapify(aggregates._top)
+            return aggregates
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка загрузки агрегатов: {e}")
+            return None
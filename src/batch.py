@@ -0,0 +1,130 @@
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+from src.aggregates import HomePageAggregates
+from src.fx import FxRateTable, convert_currency, get_fx_table, missing_rates
+from src.reports import spending_report_all_categories
+from src.services import select_p2p_transfers
+from src.utils import TRANSACTION_COLUMNS, file_reader, normalize_transactions, to_records
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/batch.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+
+def find_workbooks(pattern: str) -> list:
+    """
+    Возвращает отсортированный список EXCEL-файлов по каталогу или glob-шаблону.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.xlsx")
+    return sorted(glob.glob(pattern))
+
+
+def analyze_file(
+    file_path: str, date: Optional[str] = None, fx_table: Optional[FxRateTable] = None, check_rates: bool = False
+) -> dict:
+    """
+    Считывает и нормализует один файл, приводит суммы к рублям и считает по нему частичные результаты:
+    агрегаты главной страницы, переводы физическим лицам и суммы трат по категориям.
+
+    :param fx_table: Таблица курсов, которая только читается (курсы не запрашиваются и не сохраняются).
+        Без нее используется общая таблица с запросом недостающих курсов.
+    :param check_rates: Если в fx_table не хватает курсов, вернуть вместо результатов
+        недостающие пары (ключ missing_rates), чтобы запросить их один раз для всех файлов.
+    """
+    try:
+        df = normalize_transactions(file_reader(file_path, TRANSACTION_COLUMNS))
+        if df.empty:
+            raise ValueError("Нет данных")
+        if check_rates:
+            missing = missing_rates(df, fx_table)
+            if not missing.empty:
+                return {"file": file_path, "missing_rates": missing}
+        df = convert_currency(df, fx_table, fetch=fx_table is None)
+        _, totals = spending_report_all_categories(df, date, max_workers=0)
+        return {
+            "file": file_path,
+            "aggregates": HomePageAggregates.from_frame(df),
+            "p2p_transfers": to_records(select_p2p_transfers(df)),
+            "category_totals": {str(category): float(total) for category, total in totals.items()},
+        }
+    except Exception as e:
+        logger.error(f"Ошибка анализа файла {file_path}: {e}")
+        return {"file": file_path, "error": str(e)}
+
+
+def merge_results(partials: list) -> dict:
+    """
+    Объединяет частичные результаты файлов: суммы по картам, топ транзакций,
+    переводы физическим лицам и суммы трат по категориям.
+    """
+    aggregates = HomePageAggregates()
+    p2p_transfers = []
+    category_totals: dict = {}
+    files, errors = [], []
+    for partial in partials:
+        if "error" in partial:
+            errors.append({"file": partial["file"], "error": partial["error"]})
+            continue
+        files.append(partial["file"])
+        aggregates.merge(partial["aggregates"])
+        p2p_transfers.extend(partial["p2p_transfers"])
+        for category, total in partial["category_totals"].items():
+            category_totals[category] = category_totals.get(category, 0.0) + total
+    return {
+        "files": files,
+        "errors": errors,
+        "rows": aggregates.rows,
+        "cards": aggregates.card_summary(),
+        "top_transactions": aggregates.top_transactions(),
+        "p2p_transfers": p2p_transfers,
+        "category_totals": {category: round(total, 2) for category, total in sorted(category_totals.items())},
+    }
+
+
+def analyze_files(pattern: str, date: Optional[str] = None, max_workers: Optional[int] = None) -> dict:
+    """
+    Параллельно анализирует несколько выгрузок в пуле процессов и объединяет результаты.
+    Процессы только читают таблицу курсов; недостающие курсы запрашиваются один раз в основном процессе.
+
+    :param pattern: Каталог с EXCEL-файлами или glob-шаблон.
+    :param date: Дата отчета по категориям в формате 'DD.MM.YYYY'. Если не указана, берется текущая дата.
+    :param max_workers: Количество процессов. По умолчанию - число ядер. При 1 файлы обрабатываются в текущем процессе.
+    :return: Объединенные результаты по всем файлам.
+    """
+    files = find_workbooks(pattern)
+    if not files:
+        logger.error(f"Файлы по шаблону {pattern} не найдены")
+        return merge_results([])
+    fx_table = get_fx_table()
+    partials = _analyze(files, date, fx_table, True, max_workers)
+    pending = [i for i, partial in enumerate(partials) if "missing_rates" in partial]
+    if pending:
+        # Недостающие курсы всех файлов запрашиваются одним вызовом в основном процессе,
+        # затем файлы без курсов обрабатываются повторно с пополненной таблицей
+        fx_table.fetch(pd.concat([partials[i]["missing_rates"] for i in pending]).drop_duplicates())
+        retried = _analyze([files[i] for i in pending], date, fx_table, False, max_workers)
+        for i, partial in zip(pending, retried):
+            partials[i] = partial
+    logger.info(f"Обработано файлов: {len(files)}")
+    return merge_results(partials)
+
+
+def _analyze(
+    files: list, date: Optional[str], fx_table: FxRateTable, check_rates: bool, max_workers: Optional[int]
+) -> list:
+    """Анализирует файлы в текущем процессе или в пуле процессов."""
+    if max_workers == 1 or len(files) == 1:
+        return [analyze_file(file_path, date, fx_table, check_rates) for file_path in files]
+    count = len(files)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(analyze_file, files, [date] * count, [fx_table] * count, [check_rates] * count))
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+import pandas as pd
+
+from src.metrics import timed
+from src.utils import file_reader
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/cache.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+CACHE_DIR = "data/cache"
+CACHE_MAX_BYTES = 1024 * 1024 * 1024
+CACHE_VERSION = 1
+
+
+def file_fingerprint(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла, читая его блоками.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_name(file_path: str, columns: Optional[list] = None) -> str:
+    """
+    Имя записи кэша: хэш абсолютного пути к файлу и набора считываемых колонок.
+    """
+    key = json.dumps([os.path.abspath(file_path), columns], ensure_ascii=False)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _entry_paths(cache_dir: str, name: str) -> tuple[str, str]:
+    """Возвращает пути к данным и метаданным записи кэша."""
+    return os.path.join(cache_dir, f"{name}.pkl"), os.path.join(cache_dir, f"{name}.json")
+
+
+def _remove_entry(data_path: str, meta_path: str) -> None:
+    """Удаляет файлы записи кэша, если они существуют."""
+    for path in (data_path, meta_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_fresh(meta: dict, file_path: str, stat: os.stat_result) -> bool:
+    """
+    Проверяет актуальность записи кэша.
+
+    Если размер и mtime совпадают, запись считается актуальной без чтения файла.
+    Иначе сравнивается хэш содержимого (например, файл скопировали заново без изменений).
+    """
+    if meta.get("version") != CACHE_VERSION or meta.get("path") != os.path.abspath(file_path):
+        return False
+    if meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    return meta.get("size") == stat.st_size and meta.get("sha256") == file_fingerprint(file_path)
+
+
+@timed()
+def cached_file_reader(
+    file_path: str = "",
+    columns: Optional[list] = None,
+    cache_dir: str = CACHE_DIR,
+    max_bytes: int = CACHE_MAX_BYTES,
+) -> pd.DataFrame:
+    """
+    Считывает EXCEL-файл через бинарный кэш.
+
+    Если передан список columns, считываются и кэшируются только эти колонки.
+    Первый вызов читает xlsx через file_reader и сохраняет DataFrame в cache_dir.
+    Последующие вызовы загружают данные из кэша, пока путь, размер, mtime и хэш файла не изменятся.
+    Если запись кэша устарела или повреждена, данные перечитываются из xlsx.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError as e:
+        logger.error(f"Файл {file_path} недоступен: {e}")
+        return pd.DataFrame()
+
+    name = _entry_name(file_path, columns)
+    data_path, meta_path = _entry_paths(cache_dir, name)
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if _is_fresh(meta, file_path, stat):
+            df = pd.read_pickle(data_path)
+            os.utime(meta_path)
+            if meta.get("mtime_ns") != stat.st_mtime_ns:
+                meta["mtime_ns"] = stat.st_mtime_ns
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+            logger.info(f"Данные {file_path} загружены из кэша")
+            return df
+        logger.info(f"Кэш для {file_path} устарел")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Повреждена запись кэша для {file_path}: {e}")
+        _remove_entry(data_path, meta_path)
+
+    df = file_reader(file_path, columns)
+    if not df.empty:
+        _store_entry(df, file_path, stat, data_path, meta_path)
+        prune_cache(cache_dir, max_bytes)
+    return df
+
+
+def _store_entry(df: pd.DataFrame, file_path: str, stat: os.stat_result, data_path: str, meta_path: str) -> None:
+    """
+    Сохраняет DataFrame и метаданные в кэш.
+
+    Данные записываются во временный файл и атомарно переименовываются,
+    метаданные пишутся последними, поэтому прерванная запись не считается актуальной.
+    """
+    try:
+        os.makedirs(os.path.dirname(data_path) or ".", exist_ok=True)
+        tmp_path = f"{data_path}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, data_path)
+        meta = {
+            "version": CACHE_VERSION,
+            "path": os.path.abspath(file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_fingerprint(file_path),
+        }
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        logger.info(f"Кэш для {file_path} сохранен в {data_path}")
+    except Exception as e:
+        logger.error(f"Ошибка сохранения кэша для {file_path}: {e}")
+        _remove_entry(data_path, meta_path)
+
+
+def invalidate_cache(file_path: Optional[str] = None, cache_dir: str = CACHE_DIR) -> int:
+    """
+    Удаляет записи кэша для указанного файла или весь кэш, если файл не указан.
+    Возвращает количество удаленных записей.
+    """
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return removed
+    target = os.path.abspath(file_path) if file_path else None
+    for entry in os.listdir(cache_dir):
+        if not entry.endswith(".json"):
+            continue
+        meta_path = os.path.join(cache_dir, entry)
+        data_path = meta_path[: -len(".json")] + ".pkl"
+        if target is not None:
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    if json.load(f).get("path") != target:
+                        continue
+            except Exception:
+                pass
+        _remove_entry(data_path, meta_path)
+        removed += 1
+    logger.info(f"Удалено записей кэша: {removed}")
+    return removed
+
+
+def prune_cache(cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES) -> None:
+    """
+    Ограничивает размер каталога кэша, удаляя давно не использовавшиеся записи.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    total = 0
+    for entry in os.listdir(cache_dir):
+        if not entry.endswith(".json"):
+            continue
+        meta_path = os.path.join(cache_dir, entry)
+        data_path = meta_path[: -len(".json")] + ".pkl"
+        size = sum(os.path.getsize(p) for p in (data_path, meta_path) if os.path.exists(p))
+        entries.append((os.path.getmtime(meta_path), size, data_path, meta_path))
+        total += size
+
+    for _, size, data_path, meta_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove_entry(data_path, meta_path)
+        total -= size
+        logger.info(f"Запись кэша {data_path} удалена по лимиту размера")
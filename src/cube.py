@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+from src.metrics import timed
+from src.utils import card_suffix, parse_amounts, parse_dates
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/cube.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+CUBE_PATH = "data/spending_cube.json"
+
+DIMENSIONS = ["month", "category", "card"]
+MEASURES = ["spent", "count", "cashback"]
+
+
+def _month(date: Optional[str]) -> Optional[str]:
+    """Месяц даты 'DD.MM.YYYY' в формате 'YYYY-MM'."""
+    return datetime.strptime(date, "%d.%m.%Y").strftime("%Y-%m") if date else None
+
+
+def _as_list(value: str | list | None) -> Optional[list]:
+    """Приводит фильтр к списку значений."""
+    return [value] if isinstance(value, str) else value
+
+
+class SpendingCube:
+    """
+    Материализованный куб трат: сумма трат (spent, положительное число), количество трат (count)
+    и кэшбэк (cashback) по месяцу, категории и последним цифрам карты.
+
+    Куб строится за один векторный проход groupby и пополняется новыми строками методом update,
+    поэтому ответы query, month_over_month и year_to_date зависят от числа ячеек, а не от числа
+    транзакций. Окна запросов задаются с точностью до месяца. Между запусками куб сохраняется
+    в файл и дополняется только новыми строками (см. src.utils.restore_state).
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.fingerprint = None
+        self.cells = pd.DataFrame(
+            {measure: pd.Series(dtype=float) for measure in MEASURES},
+            index=pd.MultiIndex.from_tuples([], names=DIMENSIONS),
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SpendingCube":
+        """Строит куб по всему DataFrame."""
+        cube = cls()
+        cube.update(df)
+        return cube
+
+    @staticmethod
+    def _aggregate(df: pd.DataFrame) -> pd.DataFrame:
+        """Агрегирует траты DataFrame по измерениям куба."""
+        amounts = parse_amounts(df["Сумма операции"])
+        spent = (amounts < 0).to_numpy()
+        dates = parse_dates(df["Дата операции"])[spent]
+        cards = df["Номер карты"] if "Номер карты" in df.columns else pd.Series("", index=df.index)
+        if not isinstance(cards.dtype, pd.CategoricalDtype):
+            cards = card_suffix(cards).where(cards.notna())
+        cashback = df["Кэшбэк"] if "Кэшбэк" in df.columns else pd.Series(0.0, index=df.index)
+        frame = pd.DataFrame(
+            {
+                "month": dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]"),
+                "category": df["Категория"].astype("category").array[spent],
+                "card": cards.astype("category").array[spent],
+                "spent": -amounts.to_numpy()[spent],
+                "count": 1.0,
+                "cashback": parse_amounts(cashback).fillna(0).to_numpy()[spent],
+            }
+        )
+        frame = frame[frame["month"].notna()]
+        # Категория и карта остаются Categorical, поэтому группировка идет по датам месяца и кодам категорий,
+        # а строки меток формируются только для ячеек
+        cells = frame.groupby(DIMENSIONS, observed=True, dropna=False)[MEASURES].sum().reset_index()
+        cells["month"] = cells["month"].dt.strftime("%Y-%m")
+        cells[["category", "card"]] = cells[["category", "card"]].astype(object).fillna("")
+        return cells.set_index(DIMENSIONS)
+
+    @timed("cube_update")
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Добавляет новые транзакции в куб.
+        """
+        if df.empty:
+            return
+        self._add(self._aggregate(df))
+        self.rows += len(df)
+
+    def merge(self, other: "SpendingCube") -> None:
+        """Добавляет куб, посчитанный по другой части данных."""
+        self._add(other.cells)
+        self.rows += other.rows
+
+    def _add(self, cells: pd.DataFrame) -> None:
+        """Складывает ячейки с ячейками куба."""
+        self.cells = cells.copy() if self.cells.empty else self.cells.add(cells, fill_value=0)
+        self.cells = self.cells.sort_index()
+
+    @timed("cube_query")
+    def query(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        category: str | list | None = None,
+        card: str | list | None = None,
+        by: tuple = ("category",),
+    ) -> pd.DataFrame:
+        """
+        Траты за окно месяцев в срезе по выбранным измерениям.
+
+        :param start_date: Начало окна 'DD.MM.YYYY'; учитывается весь месяц этой даты.
+        :param end_date: Конец окна 'DD.MM.YYYY'; учитывается весь месяц этой даты.
+        :param category: Категория или список категорий.
+        :param card: Последние цифры карты или их список.
+        :param by: Измерения группировки из 'month', 'category', 'card'. Пустой кортеж - итог одной строкой.
+        :return: DataFrame с колонками измерений by и spent, count, cashback.
+        """
+        cells = self.cells.reset_index()
+        mask = pd.Series(True, index=cells.index)
+        if start_date:
+            mask &= cells["month"] >= _month(start_date)
+        if end_date:
+            mask &= cells["month"] <= _month(end_date)
+        if category is not None:
+            mask &= cells["category"].isin(_as_list(category))
+        if card is not None:
+            mask &= cells["card"].isin(_as_list(card))
+        cells = cells[mask]
+
+        by = list(by)
+        if not by:
+            result = cells[MEASURES].sum().to_frame().T
+        else:
+            result = cells.groupby(by, sort=True)[MEASURES].sum().reset_index()
+        result["spent"] = result["spent"].round(2)
+        result["count"] = result["count"].astype(int)
+        result["cashback"] = result["cashback"].round(2)
+        return result
+
+    def month_over_month(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        category: str | list | None = None,
+        card: str | list | None = None,
+    ) -> pd.DataFrame:
+        """
+        Траты по месяцам с изменением к предыдущему месяцу в процентах (колонка change).
+        """
+        result = self.query(start_date, end_date, category, card, by=("month",))
+        result["change"] = (result["spent"].pct_change() * 100).round(2)
+        return result
+
+    def year_to_date(
+        self, date: Optional[str] = None, by: tuple = ("category",), card: str | list | None = None
+    ) -> pd.DataFrame:
+        """
+        Траты с начала года по месяц даты включительно.
+
+        :param date: Дата в формате 'DD.MM.YYYY'. Если не указана, берется текущая дата.
+        """
+        end = datetime.strptime(date, "%d.%m.%Y") if date else datetime.today()
+        return self.query(f"01.01.{end.year}", end.strftime("%d.%m.%Y"), card=card, by=by)
+
+    def save(self, path: str = CUBE_PATH) -> None:
+        """Сохраняет куб в JSON-файл."""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            state = {
+                "rows": self.rows,
+                "fingerprint": self.fingerprint,
+                "cells": self.cells.reset_index().to_dict(orient="split")["data"],
+            }
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(f"{path}.tmp", path)
+            logger.info(f"Куб трат сохранен в {path}")
+        except Exception as e:
+            logger.error(f"Ошибка сохранения куба трат: {e}")
+
+    @classmethod
+    def load(cls, path: str = CUBE_PATH) -> "SpendingCube | None":
+        """Загружает куб из JSON-файла. Возвращает None, если файла нет или он поврежден."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            cube = cls()
+            cube.rows = state["rows"]
+            cube.fingerprint = state.get("fingerprint")
+            if state["cells"]:
+                cube.cells = pd.DataFrame(state["cells"], columns=DIMENSIONS + MEASURES).set_index(DIMENSIONS)
+            return cube
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка загрузки куба трат: {e}")
+            return None
@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import timed
+from src.utils import parse_amounts, parse_dates
+from src.views import REQUEST_TIMEOUT, get_session, load_env
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/fx.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+FIXER_TIMESERIES_URL = "https://api.apilayer.com/fixer/timeseries"
+FX_RATES_PATH = "data/fx_rates.json"
+BASE_CURRENCY = "RUB"
+
+# Наибольший период одного запроса timeseries в API Layer
+TIMESERIES_MAX_DAYS = 365
+
+# Если курса на дату операции нет, берется ближайший известный курс не дальше этого числа дней
+RATE_TOLERANCE_DAYS = 7
+
+# Через столько дней пары, курса для которых не было в ответе API, запрашиваются снова
+UNAVAILABLE_RECHECK_DAYS = 7
+
+
+class FxRateTable:
+    """
+    Локальная таблица исторических курсов: стоимость одной единицы валюты в базовой валюте по дням.
+
+    Недостающие пары (дата, валюта) запрашиваются пакетно: один запрос timeseries на период
+    до TIMESERIES_MAX_DAYS дней сразу по всем валютам. Полученные курсы сохраняются в файл
+    и повторно не запрашиваются. Пары, которых не оказалось в успешном ответе API, тоже
+    сохраняются (unavailable) с временем проверки и повторно запрашиваются только
+    через UNAVAILABLE_RECHECK_DAYS дней.
+    """
+
+    def __init__(self, base: str = BASE_CURRENCY, path: Optional[str] = FX_RATES_PATH):
+        self.base = base
+        self.path = path
+        self.rates: dict = {}
+        self.unavailable: dict = {}
+        if path:
+            self._load()
+
+    def missing(self, dates: pd.Series, currencies: pd.Series) -> pd.DataFrame:
+        """Пары (день, валюта) операций, для которых в таблице нет курса и которые недавно не проверялись."""
+        pairs = pd.DataFrame({"date": dates.dt.strftime("%Y-%m-%d"), "currency": currencies.astype(str)})
+        pairs = pairs.dropna().drop_duplicates()
+        pairs = pairs[pairs["currency"] != self.base]
+        recheck_after = time.time() - UNAVAILABLE_RECHECK_DAYS * 24 * 3600
+        known = [
+            date in self.rates.get(currency, {}) or self.unavailable.get(currency, {}).get(date, 0) > recheck_after
+            for date, currency in pairs.itertuples(index=False, name=None)
+        ]
+        return pairs[~np.array(known, dtype=bool)].reset_index(drop=True)
+
+    @timed("fx_fetch")
+    def fetch(self, pairs: pd.DataFrame, timeout: float = REQUEST_TIMEOUT) -> int:
+        """
+        Запрашивает курсы для пар (день, валюта) и сохраняет таблицу.
+        Пары, отсутствующие в успешном ответе, запоминаются как недоступные. Ответ с ошибкой
+        (success=false: исчерпан лимит, неверный ключ) записывается в лог и ничего не меняет.
+
+        :param pairs: DataFrame с колонками date ('YYYY-MM-DD') и currency.
+        :return: Количество полученных курсов.
+        """
+        if pairs.empty:
+            return 0
+        load_env()
+        headers = {"apikey": os.getenv("API_KEY_LAYER")}
+        days = pd.to_datetime(pairs["date"])
+        received = unavailable = 0
+        for start, end in _windows(sorted(days.unique())):
+            window = pairs[(days >= start) & (days <= end)]
+            params = {
+                "start_date": start.strftime("%Y-%m-%d"),
+                "end_date": end.strftime("%Y-%m-%d"),
+                "base": self.base,
+                "symbols": ",".join(sorted(window["currency"].unique())),
+            }
+            try:
+                response = get_session().get(FIXER_TIMESERIES_URL, params=params, headers=headers, timeout=timeout)
+                response.raise_for_status()
+                payload = response.json()
+                if not payload.get("success") or not isinstance(payload.get("rates"), dict):
+                    raise ValueError(f"API вернул ошибку: {payload.get('error')}")
+                for date, day_rates in payload["rates"].items():
+                    for currency, rate in day_rates.items():
+                        if rate:
+                            self.rates.setdefault(currency, {})[date] = 1 / rate
+                            self.unavailable.get(currency, {}).pop(date, None)
+                            received += 1
+                checked_at = time.time()
+                for date, currency in window.itertuples(index=False, name=None):
+                    if date not in self.rates.get(currency, {}):
+                        self.unavailable.setdefault(currency, {})[date] = checked_at
+                        unavailable += 1
+            except Exception as e:
+                logger.error(f"Ошибка получения курсов за {params['start_date']} - {params['end_date']}: {e}")
+        if received or unavailable:
+            self.save()
+        logger.info(f"Получено курсов: {received}, недоступно: {unavailable}")
+        return received
+
+    def frame(self) -> pd.DataFrame:
+        """Таблица курсов в виде DataFrame с колонками date, currency, rate, отсортированная по дате."""
+        records = [
+            (date, currency, rate) for currency, rates in self.rates.items() for date, rate in rates.items()
+        ]
+        frame = pd.DataFrame(records, columns=["date", "currency", "rate"])
+        frame["date"] = pd.to_datetime(frame["date"])
+        frame["currency"] = frame["currency"].astype(str)
+        return frame.sort_values("date", ignore_index=True)
+
+    def lookup(self, dates: pd.Series, currencies: pd.Series) -> np.ndarray:
+        """
+        Курсы для каждой строки одним соединением по (дню, валюте).
+        Для базовой валюты курс равен 1, для неизвестных пар - NaN.
+        """
+        left = pd.DataFrame(
+            {"date": dates.dt.normalize().to_numpy(), "currency": currencies.astype(object).to_numpy()}
+        )
+        left["position"] = np.arange(len(left))
+        left = left.dropna().sort_values("date")
+        left["currency"] = left["currency"].astype(str)
+        result = np.full(len(dates), np.nan)
+        table = self.frame()
+        if not left.empty and not table.empty:
+            merged = pd.merge_asof(
+                left,
+                table,
+                on="date",
+                by="currency",
+                direction="nearest",
+                tolerance=pd.Timedelta(days=RATE_TOLERANCE_DAYS),
+            )
+            result[merged["position"].to_numpy()] = merged["rate"].to_numpy()
+        result[(currencies.astype(object) == self.base).to_numpy()] = 1.0
+        return result
+
+    def save(self) -> None:
+        """Сохраняет таблицу курсов в файл."""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # Временный файл уникален для процесса, поэтому одновременные сохранения не пишут в один файл
+            with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8") as f:
+                json.dump({"base": self.base, "rates": self.rates, "unavailable": self.unavailable}, f)
+            os.replace(f.name, self.path)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения курсов: {e}")
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("base") == self.base:
+                self.rates = state["rates"]
+                # В файлах старого формата вместо времени проверки хранится список дат - такие пары уже устарели
+                self.unavailable = {
+                    currency: dates if isinstance(dates, dict) else dict.fromkeys(dates, 0)
+                    for currency, dates in state.get("unavailable", {}).items()
+                }
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка загрузки курсов: {e}")
+
+
+def _windows(days: list) -> list:
+    """Разбивает отсортированные дни на периоды не длиннее TIMESERIES_MAX_DAYS дней."""
+    windows = []
+    for day in days:
+        day = pd.Timestamp(day)
+        if windows and day - windows[-1][0] < timedelta(days=TIMESERIES_MAX_DAYS):
+            windows[-1][1] = day
+        else:
+            windows.append([day, day])
+    return [tuple(window) for window in windows]
+
+
+_fx_table = None
+
+
+def get_fx_table() -> FxRateTable:
+    """Возвращает общую таблицу курсов, загружая ее из файла при первом обращении."""
+    global _fx_table
+    if _fx_table is None:
+        _fx_table = FxRateTable()
+    return _fx_table
+
+
+def _split_foreign(df: pd.DataFrame, table: FxRateTable, prefer_settled: bool) -> tuple:
+    """
+    Суммы операций с подставленной суммой платежа в базовой валюте и маска строк, которые нужно
+    пересчитать по курсу. Если операций в других валютах нет, вместо сумм возвращается None.
+    """
+    currencies = df["Валюта операции"].astype(object)
+    foreign = (currencies.notna() & (currencies != table.base)).to_numpy(copy=True)
+    if not foreign.any():
+        return None, foreign
+
+    amounts = parse_amounts(df["Сумма операции"]).to_numpy(copy=True)
+    if prefer_settled and {"Сумма платежа", "Валюта платежа"} <= set(df.columns):
+        settled = foreign & (df["Валюта платежа"].astype(object) == table.base).to_numpy()
+        settled &= df["Сумма платежа"].notna().to_numpy()
+        amounts[settled] = parse_amounts(df["Сумма платежа"]).to_numpy()[settled]
+        foreign &= ~settled
+    return amounts, foreign
+
+
+def missing_rates(
+    df: pd.DataFrame, table: Optional[FxRateTable] = None, prefer_settled: bool = True
+) -> pd.DataFrame:
+    """
+    Пары (день, валюта), курсы которых нужны convert_currency для df и которых нет в таблице.
+    Позволяет собрать недостающие курсы по нескольким наборам данных и запросить их одним вызовом fetch.
+    """
+    table = table or get_fx_table()
+    if "Валюта операции" not in df.columns:
+        return pd.DataFrame(columns=["date", "currency"])
+    amounts, foreign = _split_foreign(df, table, prefer_settled)
+    if amounts is None or not foreign.any():
+        return pd.DataFrame(columns=["date", "currency"])
+    return table.missing(parse_dates(df["Дата операции"])[foreign], df["Валюта операции"].astype(object)[foreign])
+
+
+@timed()
+def convert_currency(
+    df: pd.DataFrame, table: Optional[FxRateTable] = None, fetch: bool = True, prefer_settled: bool = True
+) -> pd.DataFrame:
+    """
+    Приводит суммы операций к базовой валюте таблицы курсов (по умолчанию RUB).
+
+    Для операций в другой валюте сначала берется сумма платежа, если она списана в базовой валюте
+    (фактическая сумма списания банком), остальные суммы пересчитываются по курсу на день операции.
+    Недостающие курсы запрашиваются пакетно и кэшируются. Суммы, для которых курс получить
+    не удалось, остаются без изменений. Исходный DataFrame не изменяется.
+
+    :param df: DataFrame с транзакциями.
+    :param table: Таблица курсов. По умолчанию общая таблица get_fx_table().
+    :param fetch: Запрашивать недостающие курсы через API.
+    :param prefer_settled: Использовать сумму платежа в базовой валюте, если она есть.
+    :return: DataFrame, в котором пересчитанные суммы указаны в базовой валюте, а 'Валюта операции' равна ей.
+    """
+    try:
+        if "Валюта операции" not in df.columns:
+            return df
+        table = table or get_fx_table()
+        amounts, foreign = _split_foreign(df, table, prefer_settled)
+        if amounts is None:
+            return df
+        currencies = df["Валюта операции"].astype(object)
+
+        if foreign.any():
+            dates = parse_dates(df["Дата операции"])[foreign]
+            if fetch:
+                table.fetch(table.missing(dates, currencies[foreign]))
+            rates = table.lookup(dates, currencies[foreign])
+            converted = amounts[foreign] * rates
+            unknown = np.isnan(rates)
+            if unknown.any():
+                logger.error(f"Нет курса для {unknown.sum()} операций, суммы оставлены в исходной валюте")
+            amounts[foreign] = np.where(unknown, amounts[foreign], np.round(converted, 2))
+            foreign[foreign] = unknown
+
+        result = df.copy(deep=False)
+        result["Сумма операции"] = amounts
+        column = currencies.mask(currencies.notna().to_numpy() & ~foreign, table.base)
+        if isinstance(df["Валюта операции"].dtype, pd.CategoricalDtype):
+            column = column.astype("category")
+        result["Валюта операции"] = column
+        return result
+    except Exception as e:
+        logger.error(f"Ошибка пересчета сумм в базовую валюту: {e}")
+        return df
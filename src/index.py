@@ -0,0 +1,79 @@
+import logging
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils import get_period, normalize_transactions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/index.log", mode="w", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+
+class TransactionIndex:
+    """
+    Индекс транзакций для быстрых запросов трат по категории за период.
+
+    Строится один раз на набор данных: для каждой категории хранятся позиции строк с расходами,
+    отсортированные по дате операции, и массив дат этих строк. Запрос за период сводится
+    к двум вызовам searchsorted и срезу, без полного просмотра DataFrame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = normalize_transactions(df)
+        self._partitions: dict = {}
+        if self.df.empty:
+            return
+
+        dates = self.df["Дата операции"].to_numpy(dtype="datetime64[ns]")
+        spent = (self.df["Сумма операции"].to_numpy() < 0) & ~np.isnat(dates)
+        positions = np.flatnonzero(spent)
+        positions = positions[np.argsort(dates[positions], kind="stable")]
+        categories = self.df["Категория"].to_numpy()[positions]
+
+        for category in pd.unique(categories):
+            offsets = positions[categories == category]
+            self._partitions[category] = (offsets, dates[offsets])
+        logger.info(f"Индекс построен: {len(self.df)} строк, {len(self._partitions)} категорий")
+
+    @property
+    def categories(self) -> list:
+        """Список категорий, по которым есть расходы."""
+        return list(self._partitions)
+
+    def _positions(self, category: str, date: Optional[str] = None) -> np.ndarray:
+        """Возвращает позиции строк с расходами по категории за трехмесячный период."""
+        if category not in self._partitions:
+            return np.empty(0, dtype=np.intp)
+        start_date, end_date = get_period(date)
+        offsets, dates = self._partitions[category]
+        left = np.searchsorted(dates, np.datetime64(start_date, "ns"), side="left")
+        right = np.searchsorted(dates, np.datetime64(end_date, "ns"), side="right")
+        return np.sort(offsets[left:right])
+
+    def spending_by_category(self, category: str, date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Возвращает траты по категории за последние три месяца (аналог reports.spending_by_category).
+
+        :param category: Название категории транзакций.
+        :param date: Опциональная дата в формате 'DD.MM.YYYY'. Если не указана, берется текущая дата.
+        :return: DataFrame с тратами по категории в исходном порядке строк.
+        """
+        try:
+            return self.df.take(self._positions(category, date)).reset_index(drop=True)
+        except Exception as e:
+            logger.error(f"Ошибка при фильтрации трат по категории '{category}': {e}")
+            return pd.DataFrame()
+
+    def spending_batch(self, queries: Iterable[tuple[str, Optional[str]]]) -> list[pd.DataFrame]:
+        """
+        Отвечает на список запросов (категория, дата) за один вызов.
+
+        :param queries: Пары (категория, дата в формате 'DD.MM.YYYY' или None).
+        :return: Список DataFrame в порядке запросов.
+        """
+        return [self.spending_by_category(category, date) for category, date in queries]
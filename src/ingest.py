@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+from typing import Optional
+
+import pandas as pd
+
+from src.aggregates import HomePageAggregates
+from src.cube import SpendingCube
+from src.fx import convert_currency
+from src.stream import BATCH_SIZE, iter_batches
+from src.utils import TRANSACTION_COLUMNS, normalize_transactions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/ingest.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+STORE_DIR = "data/store"
+WATERMARK_FILE = "watermark.json"
+
+
+def row_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """Возвращает 64-битный отпечаток содержимого каждой строки."""
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def load_watermark(store_dir: str = STORE_DIR) -> dict:
+    """
+    Загружает водяной знак хранилища: время последней операции и отпечатки строк с этим временем.
+    """
+    try:
+        with open(os.path.join(store_dir, WATERMARK_FILE), "r", encoding="utf-8") as f:
+            watermark = json.load(f)
+        return {
+            "timestamp": pd.Timestamp(watermark["timestamp"]) if watermark["timestamp"] else None,
+            "fingerprints": set(watermark["fingerprints"]),
+            "segments": watermark["segments"],
+        }
+    except FileNotFoundError:
+        return {"timestamp": None, "fingerprints": set(), "segments": 0}
+
+
+def _save_watermark(store_dir: str, watermark: dict) -> None:
+    """Атомарно сохраняет водяной знак хранилища."""
+    path = os.path.join(store_dir, WATERMARK_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "timestamp": watermark["timestamp"].isoformat() if watermark["timestamp"] is not None else None,
+                "fingerprints": sorted(watermark["fingerprints"]),
+                "segments": watermark["segments"],
+            },
+            f,
+        )
+    os.replace(f"{path}.tmp", path)
+
+
+def ingest_statement(
+    file_path: str,
+    store_dir: str = STORE_DIR,
+    batch_size: int = BATCH_SIZE,
+    aggregates: Optional[HomePageAggregates] = None,
+    cube: Optional[SpendingCube] = None,
+) -> pd.DataFrame:
+    """
+    Добавляет в локальное хранилище только новые операции из выгрузки.
+
+    Выгрузка читается пакетами от новых операций к старым; чтение прекращается на первом пакете,
+    целиком лежащем до водяного знака. Строки со временем, равным водяному знаку, сверяются
+    по отпечаткам, чтобы перекрытие соседних выгрузок не давало дублей. Новые строки
+    записываются отдельным сегментом с суммами, приведенными к рублям, поэтому повторная
+    загрузка стоит только дельту.
+    Хранилище читается через file_reader(store_dir).
+
+    :param file_path: Путь к EXCEL-выгрузке (операции отсортированы от новых к старым, как в выгрузке банка).
+    :param store_dir: Каталог хранилища.
+    :param batch_size: Размер пакета чтения.
+    :param aggregates: Опциональные агрегаты главной страницы, которые обновляются новыми строками.
+    :param cube: Опциональный куб трат, который обновляется новыми строками.
+    :return: DataFrame добавленных строк.
+    """
+    try:
+        watermark = load_watermark(store_dir)
+        since = watermark["timestamp"]
+        parts = []
+        for batch in iter_batches(file_path, batch_size, TRANSACTION_COLUMNS):
+            dates = batch["Дата операции"]
+            if since is None:
+                parts.append(batch)
+                continue
+            fresh = batch[dates > since]
+            overlap = batch[dates == since]
+            if not overlap.empty:
+                known = row_fingerprints(overlap).isin(watermark["fingerprints"]).to_numpy()
+                fresh = pd.concat([fresh, overlap[~known]])
+            if not fresh.empty:
+                parts.append(fresh)
+            if not (dates >= since).any():
+                break
+
+        if not parts:
+            logger.info(f"Новых операций в {file_path} нет")
+            return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+        new_rows = normalize_transactions(pd.concat(parts, ignore_index=True))
+        # Отпечатки водяного знака считаются по строкам выгрузки, а в хранилище и агрегаты идут суммы в рублях
+        converted = convert_currency(new_rows)
+        os.makedirs(store_dir, exist_ok=True)
+        watermark["segments"] += 1
+        converted.to_pickle(os.path.join(store_dir, f"part-{watermark['segments']:06d}.pkl"))
+
+        latest = new_rows["Дата операции"].max()
+        latest_fingerprints = {int(value) for value in row_fingerprints(new_rows[new_rows["Дата операции"] == latest])}
+        if since is not None and latest == since:
+            latest_fingerprints |= watermark["fingerprints"]
+        if pd.notna(latest) and (since is None or latest >= since):
+            watermark["timestamp"], watermark["fingerprints"] = latest, latest_fingerprints
+        _save_watermark(store_dir, watermark)
+
+        if aggregates is not None:
+            aggregates.update(converted)
+        if cube is not None:
+            cube.update(converted)
+        logger.info(f"Из {file_path} добавлено строк: {len(converted)}")
+        return converted
+    except Exception as e:
+        logger.error(f"Ошибка загрузки выгрузки {file_path}: {e}")
+        return pd.DataFrame()
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/metrics.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+METRICS_PATH = "logs/metrics.prom"
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_enabled = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_metrics: dict = {}
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    """Включает или выключает сбор метрик. По умолчанию сбор включается переменной окружения METRICS_ENABLED=1."""
+    global _enabled
+    _enabled = enabled
+
+
+def metrics_enabled() -> bool:
+    """Возвращает True, если сбор метрик включен."""
+    return _enabled
+
+
+def reset_metrics() -> None:
+    """Удаляет накопленные метрики."""
+    with _lock:
+        _metrics.clear()
+
+
+def record(
+    name: str, seconds: float, rows: Optional[int] = None, bytes_written: Optional[int] = None, error: bool = False
+) -> None:
+    """
+    Добавляет одно измерение участка name: длительность, количество строк, записанные байты и признак ошибки.
+    """
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = {
+                "count": 0,
+                "errors": 0,
+                "seconds_total": 0.0,
+                "seconds_max": 0.0,
+                "rows_total": 0,
+                "bytes_total": 0,
+                "buckets": [0] * len(DURATION_BUCKETS),
+            }
+        metric["count"] += 1
+        metric["errors"] += error
+        metric["seconds_total"] += seconds
+        metric["seconds_max"] = max(metric["seconds_max"], seconds)
+        metric["rows_total"] += rows or 0
+        metric["bytes_total"] += bytes_written or 0
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                metric["buckets"][i] += 1
+
+
+class Span:
+    """
+    Замер участка кода в блоке with. Внутри блока можно указать количество строк (rows)
+    и записанных байт (bytes_written). Исключение в блоке учитывается как ошибка и пробрасывается дальше.
+    """
+
+    __slots__ = ("name", "rows", "bytes_written", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = None
+        self.bytes_written = None
+
+    def __enter__(self) -> "Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: any, exc: any, traceback: any) -> None:
+        record(self.name, time.perf_counter() - self._started, self.rows, self.bytes_written, exc_type is not None)
+
+
+class _NullSpan:
+    """Пустой замер, используемый при выключенном сборе метрик."""
+
+    __slots__ = ()
+
+    rows = None
+    bytes_written = None
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type: any, exc: any, traceback: any) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str) -> Span | _NullSpan:
+    """Возвращает замер участка кода для блока with (при выключенном сборе - пустой объект)."""
+    return Span(name) if _enabled else _NULL_SPAN
+
+
+def _count_rows(value: any) -> Optional[int]:
+    """Количество строк результата: длина DataFrame, Series или списка."""
+    if isinstance(value, (str, bytes, dict)) or not hasattr(value, "__len__"):
+        return None
+    return len(value)
+
+
+def timed(name: Optional[str] = None):
+    """
+    Декоратор замера функции: длительность вызова и количество строк результата.
+    При выключенном сборе метрик добавляет к вызову только проверку флага.
+
+    :param name: Имя метрики. По умолчанию имя функции.
+    """
+
+    def decorator(func: callable) -> callable:
+        metric_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                record(metric_name, time.perf_counter() - started, error=True)
+                raise
+            record(metric_name, time.perf_counter() - started, _count_rows(result))
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def metrics_summary() -> dict:
+    """
+    Сводка метрик: имя участка -> количество вызовов и ошибок, суммарное, среднее и максимальное время,
+    количество строк и записанных байт.
+    """
+    with _lock:
+        return {
+            name: {
+                "count": metric["count"],
+                "errors": metric["errors"],
+                "seconds_total": round(metric["seconds_total"], 6),
+                "seconds_avg": round(metric["seconds_total"] / metric["count"], 6),
+                "seconds_max": round(metric["seconds_max"], 6),
+                "rows_total": metric["rows_total"],
+                "bytes_total": metric["bytes_total"],
+            }
+            for name, metric in sorted(_metrics.items())
+        }
+
+
+def prometheus_text() -> str:
+    """Метрики в текстовом формате Prometheus."""
+    lines = ["# TYPE app_duration_seconds histogram"]
+    with _lock:
+        metrics = sorted((name, dict(metric, buckets=list(metric["buckets"]))) for name, metric in _metrics.items())
+    for name, metric in metrics:
+        for bound, count in zip(DURATION_BUCKETS, metric["buckets"]):
+            lines.append(f'app_duration_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+        lines.append(f'app_duration_seconds_bucket{{span="{name}",le="+Inf"}} {metric["count"]}')
+        lines.append(f'app_duration_seconds_sum{{span="{name}"}} {metric["seconds_total"]:.6f}')
+        lines.append(f'app_duration_seconds_count{{span="{name}"}} {metric["count"]}')
+    for metric_type, key in (("errors", "errors"), ("rows", "rows_total"), ("bytes", "bytes_total")):
+        lines.append(f"# TYPE app_{metric_type}_total counter")
+        lines.extend(f'app_{metric_type}_total{{span="{name}"}} {metric[key]}' for name, metric in metrics)
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(path: str = METRICS_PATH, fmt: str = "prometheus") -> bool:
+    """
+    Сохраняет метрики в файл в формате Prometheus (fmt='prometheus') или JSON-сводки (fmt='json').
+    Возвращает True, если файл записан.
+    """
+    try:
+        if fmt == "prometheus":
+            text = prometheus_text()
+        else:
+            text = json.dumps(metrics_summary(), ensure_ascii=False, indent=2)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(f"{path}.tmp", path)
+        return True
+    except Exception as e:
+        logger.error(f"Ошибка сохранения метрик в {path}: {e}")
+        return False
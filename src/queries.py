@@ -0,0 +1,199 @@
+import json
+import logging
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, TextIO
+
+import pandas as pd
+
+from src.aggregates import AGGREGATES_PATH, HomePageAggregates
+from src.cache import cached_file_reader
+from src.cube import CUBE_PATH, DIMENSIONS, SpendingCube
+from src.fx import convert_currency
+from src.index import TransactionIndex
+from src.search import SEARCH_INDEX_PATH, DescriptionIndex, search_transactions
+from src.services import select_p2p_transfers
+from src.utils import TRANSACTION_COLUMNS, normalize_transactions, restore_state, to_records
+from src.views import home_page
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/queries.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+QUERY_TYPES = ("home_page", "p2p_transfers", "category_report", "cube_report", "search")
+
+SEARCH_FILTERS = ("mode", "category", "start_date", "end_date", "mcc")
+
+
+class Dataset:
+    """
+    Загруженный один раз набор транзакций с индексом по категориям, агрегатами главной страницы,
+    кубом трат и индексом описаний. Используется только для чтения, поэтому запросы можно
+    выполнять параллельно.
+
+    При persist=True агрегаты, куб и индекс описаний загружаются из файлов и дополняются
+    только строками, добавленными после сохранения.
+    """
+
+    def __init__(self, df: pd.DataFrame, persist: bool = False):
+        self.df = normalize_transactions(df)
+        self.index = TransactionIndex(self.df)
+        self.aggregates = restore_state(HomePageAggregates, self.df, AGGREGATES_PATH if persist else None)
+        self.cube = restore_state(SpendingCube, self.df, CUBE_PATH if persist else None)
+        self.search_index = restore_state(DescriptionIndex, self.df, SEARCH_INDEX_PATH if persist else None)
+
+    @classmethod
+    def from_file(cls, file_path: str, persist: bool = True) -> "Dataset":
+        """Загружает набор транзакций из файла через бинарный кэш и приводит суммы к рублям."""
+        df = convert_currency(normalize_transactions(cached_file_reader(file_path, TRANSACTION_COLUMNS)))
+        return cls(df, persist)
+
+    def home_page(self) -> dict:
+        """Данные главной страницы."""
+        result = home_page(self.df, self.aggregates)
+        if result is None:
+            raise ValueError("Не удалось сформировать главную страницу")
+        return json.loads(result)
+
+    def p2p_transfers(self) -> list:
+        """Переводы физическим лицам."""
+        return to_records(select_p2p_transfers(self.df))
+
+    def category_report(self, category: str, date: Optional[str] = None) -> list:
+        """Траты по категории за последние три месяца."""
+        return to_records(self.index.spending_by_category(category, date))
+
+    def cube_report(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        category: Optional[str] = None,
+        card: Optional[str] = None,
+        by: str | list = "category",
+    ) -> list:
+        """Траты из куба за окно месяцев в срезе по измерениям by (через запятую: month, category, card)."""
+        by = [name for name in (by.split(",") if isinstance(by, str) else by) if name]
+        unknown = set(by) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Неизвестные измерения: {', '.join(sorted(unknown))}")
+        return to_records(self.cube.query(start_date, end_date, category, card, by=tuple(by)))
+
+    def search(self, query: str, **filters: any) -> list:
+        """Транзакции, найденные по индексу описаний (фильтры как у DescriptionIndex.search)."""
+        if filters.get("mode", "substring") not in ("substring", "prefix", "terms"):
+            raise ValueError(f"Неизвестный режим поиска: {filters['mode']}")
+        return to_records(search_transactions(self.df, self.search_index, query, **filters))
+
+
+def execute_query(dataset: Dataset, query: dict) -> dict:
+    """
+    Выполняет один запрос и возвращает ответ со статусом и временем выполнения.
+
+    Формат запроса: {"id": ..., "type": "home_page" | "p2p_transfers" | "category_report" | "cube_report",
+    "category": ..., "date": "DD.MM.YYYY"}. Поля category и date нужны только для category_report.
+    Запрос cube_report принимает необязательные start_date, end_date, category, card и by,
+    запрос search - текст query и необязательные mode, category, start_date, end_date, mcc.
+    """
+    started = time.perf_counter()
+    response = {"id": query.get("id"), "type": query.get("type")}
+    try:
+        query_type = query.get("type")
+        if query_type == "home_page":
+            response["result"] = dataset.home_page()
+        elif query_type == "p2p_transfers":
+            response["result"] = dataset.p2p_transfers()
+        elif query_type == "category_report":
+            if not query.get("category"):
+                raise ValueError("Не указана категория")
+            response["result"] = dataset.category_report(query["category"], query.get("date") or None)
+        elif query_type == "cube_report":
+            response["result"] = dataset.cube_report(
+                query.get("start_date") or None,
+                query.get("end_date") or None,
+                query.get("category") or None,
+                query.get("card") or None,
+                query.get("by", "category"),
+            )
+        elif query_type == "search":
+            filters = {name: query[name] for name in SEARCH_FILTERS if query.get(name) not in (None, "")}
+            response["result"] = dataset.search(query.get("query", ""), **filters)
+        else:
+            raise ValueError(f"Неизвестный тип запроса: {query_type}")
+        response["status"] = "ok"
+    except Exception as e:
+        logger.error(f"Ошибка выполнения запроса {query}: {e}")
+        response["status"] = "error"
+        response["error"] = str(e)
+    response["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return response
+
+
+def _read_queries(lines: Iterable[str]) -> Iterable[dict]:
+    """Разбирает строки JSONL, пропуская пустые. Некорректные строки превращаются в запросы с ошибкой."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            query = json.loads(line)
+            yield query if isinstance(query, dict) else {"id": number, "type": None}
+        except json.JSONDecodeError:
+            logger.error(f"Некорректная строка запроса {number}: {line.strip()}")
+            yield {"id": number, "type": None}
+
+
+def run_queries(
+    dataset: Dataset,
+    source: str | TextIO | None = None,
+    output: str | TextIO | None = None,
+    max_workers: int = 1,
+) -> dict:
+    """
+    Выполняет запросы из JSONL-потока на одном загруженном наборе данных и пишет ответы в JSONL.
+
+    :param dataset: Загруженный набор транзакций.
+    :param source: Путь к файлу запросов или открытый поток. По умолчанию stdin.
+    :param output: Путь к файлу ответов или открытый поток. По умолчанию stdout.
+    :param max_workers: Количество потоков для параллельного выполнения независимых запросов.
+        Ответы пишутся в порядке запросов по мере готовности; впереди читается не больше
+        2 * max_workers запросов. При одном потоке запросы выполняются без пула.
+    :return: Сводка: количество запросов, ошибок и общее время в миллисекундах.
+    """
+    started = time.perf_counter()
+    source_stream = open(source, "r", encoding="utf-8") if isinstance(source, str) else source or sys.stdin
+    output_stream = open(output, "w", encoding="utf-8") if isinstance(output, str) else output or sys.stdout
+    summary = {"queries": 0, "errors": 0}
+
+    def write(response: dict) -> None:
+        output_stream.write(json.dumps(response, ensure_ascii=False, default=str))
+        output_stream.write("\n")
+        output_stream.flush()
+        summary["queries"] += 1
+        summary["errors"] += response["status"] == "error"
+
+    try:
+        queries = _read_queries(source_stream)
+        if max_workers <= 1:
+            for query in queries:
+                write(execute_query(dataset, query))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = deque()
+                for query in queries:
+                    pending.append(executor.submit(execute_query, dataset, query))
+                    while pending and (len(pending) >= 2 * max_workers or pending[0].done()):
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        if isinstance(source, str):
+            source_stream.close()
+        if isinstance(output, str):
+            output_stream.close()
+    summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    logger.info(f"Выполнено запросов: {summary}")
+    return summary
@@ -1,39 +1,169 @@
+import atexit
 import json
 import logging
-from datetime import datetime, timedelta
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from functools import wraps
 from typing import Optional
 
 import pandas as pd
 
+from src.metrics import span, timed
+from src.storage import SQLiteStore
+from src.utils import get_period, parse_amounts, parse_dates
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler("logs/reports.log", mode="a")
+file_handler = logging.FileHandler("logs/reports.log", mode="a", delay=True)
 file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 
 
-def save_report(filename: Optional[str] = None):
+REPORT_FORMATS = {"json": "json", "json_compact": "json", "jsonl": "jsonl", "csv": "csv", "parquet": "parquet"}
+JSONL_CHUNK_SIZE = 10_000
+
+
+def write_report(result: any, report_filename: str, fmt: str = "json") -> bool:
+    """
+    Сохраняет результат (DataFrame или JSON-совместимый объект) в файл.
+
+    Форматы:
+    - json - JSON с отступами (по умолчанию);
+    - json_compact - JSON без отступов, DataFrame сериализуется напрямую без промежуточного списка словарей;
+    - jsonl - JSON Lines, DataFrame пишется частями по JSONL_CHUNK_SIZE строк;
+    - csv - CSV;
+    - parquet - Parquet (требуется pyarrow).
+    Возвращает True, если файл записан.
+    """
+    try:
+        with span("save_report") as measure:
+            if fmt not in REPORT_FORMATS:
+                raise ValueError(f"Неизвестный формат отчета: {fmt}")
+            if fmt in ("csv", "parquet") and not isinstance(result, pd.DataFrame):
+                result = pd.DataFrame(result if isinstance(result, list) else [result])
+
+            if fmt == "json":
+                if isinstance(result, pd.DataFrame):
+                    result = result.to_dict(orient="records")
+                with open(report_filename, "w", encoding="utf-8") as file:
+                    json.dump(result, file, ensure_ascii=False, indent=2, default=str)
+            elif fmt == "json_compact":
+                with open(report_filename, "w", encoding="utf-8") as file:
+                    if isinstance(result, pd.DataFrame):
+                        result.to_json(file, orient="records", force_ascii=False, date_format="iso", date_unit="s")
+                    else:
+                        json.dump(result, file, ensure_ascii=False, separators=(",", ":"), default=str)
+            elif fmt == "jsonl":
+                with open(report_filename, "w", encoding="utf-8") as file:
+                    if isinstance(result, pd.DataFrame):
+                        for start in range(0, len(result), JSONL_CHUNK_SIZE):
+                            chunk = result.iloc[start : start + JSONL_CHUNK_SIZE]
+                            lines = chunk.to_json(
+                                orient="records", lines=True, force_ascii=False, date_format="iso", date_unit="s"
+                            )
+                            file.write(lines if lines.endswith("\n") else f"{lines}\n")
+                    else:
+                        for item in result if isinstance(result, list) else [result]:
+                            file.write(json.dumps(item, ensure_ascii=False, default=str))
+                            file.write("\n")
+            elif fmt == "csv":
+                result.to_csv(report_filename, index=False)
+            else:
+                result.to_parquet(report_filename, index=False)
+
+            measure.rows = len(result) if isinstance(result, (pd.DataFrame, list)) else None
+            measure.bytes_written = os.path.getsize(report_filename)
+
+        logger.info(f"Отчет успешно сохранен в файл: {report_filename}")
+        return True
+    except Exception as e:
+        logger.error(f"Ошибка при сохранении отчета: {e}")
+        return False
+
+
+class ReportWriter:
+    """
+    Фоновая запись отчетов: задачи ставятся в очередь и пишутся отдельным потоком,
+    поэтому функция с декоратором save_report возвращает результат сразу после расчета.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, result: any, report_filename: str, fmt: str = "json") -> None:
+        """Ставит отчет в очередь на запись."""
+        self._queue.put((result, report_filename, fmt))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ждет записи всех поставленных в очередь отчетов.
+        Возвращает False, если за timeout секунд очередь не опустела.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            result, report_filename, fmt = self._queue.get()
+            try:
+                write_report(result, report_filename, fmt)
+            finally:
+                self._queue.task_done()
+
+
+_report_writer = None
+_report_writer_lock = threading.Lock()
+
+
+def get_report_writer() -> ReportWriter:
+    """Возвращает общий фоновый писатель отчетов, создавая его при первом обращении."""
+    global _report_writer
+    with _report_writer_lock:
+        if _report_writer is None:
+            _report_writer = ReportWriter()
+            atexit.register(_report_writer.flush)
+        return _report_writer
+
+
+def flush_reports(timeout: Optional[float] = None) -> bool:
+    """Ждет записи всех отчетов, поставленных в фоновую очередь."""
+    return _report_writer.flush(timeout) if _report_writer is not None else True
+
+
+def save_report(filename: Optional[str] = None, fmt: str = "json", background: bool = False):
     """
-    Декоратор для сохранения результата функции в JSON-файл.
+    Декоратор для сохранения результата функции в файл.
+
+    :param filename: Имя файла. По умолчанию report_<дата_время> с расширением формата.
+    :param fmt: Формат файла: json, json_compact, jsonl, csv или parquet (см. write_report).
+    :param background: Записывать отчет в фоновом потоке; дождаться записи можно через flush_reports.
+        Результат не должен изменяться после возврата из функции.
     """
 
     def decorator(func: callable) -> callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> any:
             result = func(*args, **kwargs)
-            report_filename = filename or f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            try:
-                if isinstance(result, pd.DataFrame):
-                    result_to_save = result.to_dict(orient="records")
-                else:
-                    result_to_save = result
-                with open(report_filename, "w", encoding="utf-8") as file:
-                    json.dump(result_to_save, file, ensure_ascii=False, indent=2, default=str)
-                logger.info(f"Отчет успешно сохранен в файл: {report_filename}")
-            except Exception as e:
-                logger.error(f"Ошибка при сохранении отчета: {e}")
+            report_filename = (
+                filename or f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{REPORT_FORMATS.get(fmt, fmt)}"
+            )
+            if background:
+                get_report_writer().submit(result, report_filename, fmt)
+            else:
+                write_report(result, report_filename, fmt)
             return result
 
         return wrapper
@@ -42,30 +172,82 @@ def save_report(filename: Optional[str] = None):
 
 
 @save_report()
+@timed()
 def spending_by_category(df: pd.DataFrame, category: str, date: Optional[str] = None) -> pd.DataFrame:
     """
     Возвращает DataFrame с тратами по заданной категории за последние три месяца.
 
-    :param df: DataFrame с транзакциями.
+    :param df: DataFrame с транзакциями или SQLiteStore. Не изменяется;
+        нормализованный DataFrame не разбирается повторно.
     :param category: Название категории транзакций.
     :param date: Опциональная дата в формате 'DD.MM.YYYY'. Если не указана, берется текущая дата.
     :return: DataFrame с тратами по категории за последние три месяца.
     """
     try:
-        end_date = datetime.strptime(date, "%d.%m.%Y") if date else datetime.today()
-        end_date = end_date.replace(hour=23, minute=59, second=59)
-        start_date = end_date - timedelta(days=90)
-        df["Дата операции"] = pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce")
-        df["Сумма операции"] = df["Сумма операции"].astype(str).str.replace(",", ".").astype(float)
-        filtered_df = df[
-            (df["Категория"] == category)
-            & (df["Дата операции"] >= start_date)
-            & (df["Дата операции"] <= end_date)
-            & (df["Сумма операции"] < 0)
-        ]
+        if isinstance(df, SQLiteStore):
+            return df.spending_by_category(category, date)
+        start_date, end_date = get_period(date)
+        dates = parse_dates(df["Дата операции"])
+        amounts = parse_amounts(df["Сумма операции"])
+        mask = (df["Категория"] == category) & (dates >= start_date) & (dates <= end_date) & (amounts < 0)
+        filtered_df = df[mask].assign(**{"Дата операции": dates[mask], "Сумма операции": amounts[mask]})
 
         return filtered_df.reset_index(drop=True)
 
     except Exception as e:
         logger.error(f"Ошибка при фильтрации трат по категории '{category}': {e}")
         return pd.DataFrame()
+
+
+def spending_report_all_categories(
+    df: pd.DataFrame, date: Optional[str] = None, output_dir: Optional[str] = None, max_workers: int = 4
+) -> tuple[dict, pd.Series]:
+    """
+    Формирует отчеты о тратах за последние три месяца сразу по всем категориям.
+
+    Период и знак суммы фильтруются один раз, затем строки группируются по категориям.
+    Отчет каждой категории и итоги сохраняются в отдельные JSON-файлы каталога output_dir
+    параллельно в пуле потоков.
+
+    :param df: DataFrame с транзакциями. Не изменяется.
+    :param date: Опциональная дата в формате 'DD.MM.YYYY'. Если не указана, берется текущая дата.
+    :param output_dir: Каталог для отчетов. По умолчанию report_<дата_время>.
+    :param max_workers: Количество потоков записи. При 0 файлы не сохраняются.
+    :return: Кортеж (словарь категория -> DataFrame трат, Series с суммой трат по категориям).
+    """
+    try:
+        start_date, end_date = get_period(date)
+        dates = parse_dates(df["Дата операции"])
+        amounts = parse_amounts(df["Сумма операции"])
+        mask = (dates >= start_date) & (dates <= end_date) & (amounts < 0)
+        window_df = df[mask].assign(**{"Дата операции": dates[mask], "Сумма операции": amounts[mask]})
+
+        grouped = window_df.groupby("Категория", observed=True, sort=True)
+        reports = {category: frame.reset_index(drop=True) for category, frame in grouped}
+        totals = grouped["Сумма операции"].sum()
+    except Exception as e:
+        logger.error(f"Ошибка при формировании отчета по всем категориям: {e}")
+        return {}, pd.Series(dtype=float)
+
+    if max_workers > 0:
+        output_dir = output_dir or f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = [
+            (frame, os.path.join(output_dir, f"{_safe_filename(category)}.json"))
+            for category, frame in reports.items()
+        ]
+        jobs.append(
+            (
+                [{"Категория": category, "Сумма операции": total} for category, total in totals.items()],
+                os.path.join(output_dir, "totals.json"),
+            )
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda job: write_report(*job), jobs))
+
+    return reports, totals
+
+
+def _safe_filename(name: str) -> str:
+    """Заменяет символы, недопустимые в имени файла."""
+    return "".join("_" if char in '<>:"/\\|?*' else char for char in str(name))
@@ -0,0 +1,224 @@
+import bisect
+import logging
+import os
+import pickle
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils import normalize_transactions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/search.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+SEARCH_INDEX_PATH = "data/search_index.pkl"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _trigrams(text: str) -> set:
+    """Возвращает множество триграмм строки."""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class DescriptionIndex:
+    """
+    Инвертированный индекс по описаниям и MCC транзакций.
+
+    Описания индексируются один раз для каждого уникального значения: по словам (для поиска
+    по префиксу и нескольким словам) и по триграммам (для поиска подстроки). Для каждого
+    описания хранятся позиции строк, поэтому результат поиска - массив позиций строк
+    в DataFrame, по которому строился индекс. Новые строки добавляются методом add.
+    Между запусками индекс сохраняется рядом с данными и дополняется только новыми строками
+    (см. src.utils.restore_state).
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.fingerprint = None
+        self._descriptions: list = []
+        self._description_ids: dict = {}
+        self._description_rows: list = []
+        self._tokens: dict = {}
+        self._sorted_tokens: list = []
+        self._trigrams: dict = {}
+        self._mcc: dict = {}
+        self._dates = np.empty(0, dtype="datetime64[ns]")
+        self._categories = np.empty(0, dtype=object)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "DescriptionIndex":
+        """Строит индекс по всему DataFrame."""
+        index = cls()
+        index.add(df)
+        return index
+
+    def add(self, df: pd.DataFrame) -> None:
+        """
+        Добавляет в индекс новые строки. Позиции продолжают нумерацию уже проиндексированных строк.
+        """
+        df = normalize_transactions(df)
+        offset = self.rows
+        codes, uniques = pd.factorize(df["Описание"])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        new_tokens = False
+
+        for code, description in enumerate(uniques):
+            positions = order[bounds[code] : bounds[code + 1]] + offset
+            description_id = self._description_ids.get(description)
+            if description_id is None:
+                description_id = len(self._descriptions)
+                self._description_ids[description] = description_id
+                self._descriptions.append(str(description).lower())
+                self._description_rows.append(positions)
+                for token in set(TOKEN_PATTERN.findall(self._descriptions[-1])):
+                    if token not in self._tokens:
+                        self._tokens[token] = set()
+                        new_tokens = True
+                    self._tokens[token].add(description_id)
+                for trigram in _trigrams(self._descriptions[-1]):
+                    self._trigrams.setdefault(trigram, set()).add(description_id)
+            else:
+                self._description_rows[description_id] = np.concatenate(
+                    [self._description_rows[description_id], positions]
+                )
+
+        if "MCC" in df.columns:
+            mcc = df["MCC"].to_numpy()
+            for value in pd.unique(mcc[~pd.isna(mcc)]):
+                positions = np.flatnonzero(mcc == value) + offset
+                key = int(value)
+                self._mcc[key] = np.concatenate([self._mcc[key], positions]) if key in self._mcc else positions
+
+        if new_tokens:
+            self._sorted_tokens = sorted(self._tokens)
+        self._dates = np.concatenate([self._dates, df["Дата операции"].to_numpy(dtype="datetime64[ns]")])
+        self._categories = np.concatenate([self._categories, df["Категория"].astype(object).to_numpy()])
+        self.rows += len(df)
+        logger.info(f"В индекс добавлено строк: {len(df)}, уникальных описаний всего: {len(self._descriptions)}")
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Добавляет новые строки (то же, что add; имя нужно для src.utils.restore_state)."""
+        self.add(df)
+
+    def _substring_ids(self, text: str) -> set:
+        """Идентификаторы описаний, содержащих подстроку."""
+        if len(text) < 3:
+            return {i for i, description in enumerate(self._descriptions) if text in description}
+        candidates = None
+        for trigram in _trigrams(text):
+            postings = self._trigrams.get(trigram)
+            if not postings:
+                return set()
+            candidates = set(postings) if candidates is None else candidates & postings
+        return {i for i in candidates if text in self._descriptions[i]}
+
+    def _prefix_ids(self, prefix: str) -> set:
+        """Идентификаторы описаний, содержащих слово с заданным префиксом."""
+        result = set()
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            result |= self._tokens[token]
+        return result
+
+    def search(
+        self,
+        query: str = "",
+        mode: str = "substring",
+        category: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        mcc: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Ищет транзакции по описанию и возвращает отсортированные позиции строк.
+
+        :param query: Текст запроса (регистр не учитывается).
+        :param mode: 'substring' - подстрока, 'prefix' - слово начинается с query,
+            'terms' - описание содержит все слова запроса (каждое как префикс слова).
+        :param category: Опциональный фильтр по категории.
+        :param start_date: Опциональное начало периода в формате 'DD.MM.YYYY'.
+        :param end_date: Опциональный конец периода в формате 'DD.MM.YYYY' (включительно).
+        :param mcc: Опциональный фильтр по MCC.
+        :return: Массив позиций строк.
+        """
+        text = query.lower().strip()
+        if not text:
+            ids = set(range(len(self._descriptions)))
+        elif mode == "substring":
+            ids = self._substring_ids(text)
+        elif mode == "prefix":
+            ids = self._prefix_ids(text)
+        elif mode == "terms":
+            ids = None
+            for term in TOKEN_PATTERN.findall(text):
+                term_ids = self._prefix_ids(term)
+                ids = term_ids if ids is None else ids & term_ids
+            ids = ids or set()
+        else:
+            raise ValueError(f"Неизвестный режим поиска: {mode}")
+
+        positions = [self._description_rows[i] for i in ids]
+        if mcc is not None:
+            positions = [np.intersect1d(np.concatenate(positions or [[]]), self._mcc.get(int(mcc), []))]
+        positions = np.sort(np.concatenate(positions)).astype(np.intp) if positions else np.empty(0, np.intp)
+
+        if category is not None:
+            positions = positions[self._categories[positions] == category]
+        if start_date is not None:
+            start = np.datetime64(pd.to_datetime(start_date, format="%d.%m.%Y"), "ns")
+            positions = positions[self._dates[positions] >= start]
+        if end_date is not None:
+            end = np.datetime64(pd.to_datetime(end_date, format="%d.%m.%Y") + pd.Timedelta(days=1), "ns")
+            positions = positions[self._dates[positions] < end]
+        return positions
+
+    def save(self, path: str = SEARCH_INDEX_PATH) -> None:
+        """Сохраняет индекс рядом с данными."""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(f"{path}.tmp", "wb") as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.tmp", path)
+            logger.info(f"Индекс сохранен в {path}")
+        except Exception as e:
+            logger.error(f"Ошибка сохранения индекса: {e}")
+
+    @classmethod
+    def load(cls, path: str = SEARCH_INDEX_PATH) -> "DescriptionIndex | None":
+        """Загружает индекс. Возвращает None, если файла нет или он поврежден."""
+        try:
+            with open(path, "rb") as f:
+                index = pickle.load(f)
+            return index if isinstance(index, cls) else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка загрузки индекса: {e}")
+            return None
+
+
+def search_transactions(df: pd.DataFrame, index: DescriptionIndex, query: str, **filters: any) -> pd.DataFrame:
+    """
+    Возвращает строки DataFrame, найденные по индексу описаний.
+
+    :param df: DataFrame, по которому строился индекс.
+    :param index: Индекс описаний.
+    :param query: Текст запроса.
+    :param filters: Параметры DescriptionIndex.search (mode, category, start_date, end_date, mcc).
+    :return: DataFrame найденных транзакций.
+    """
+    try:
+        return df.iloc[index.search(query, **filters)].reset_index(drop=True)
+    except Exception as e:
+        logger.error(f"Ошибка поиска по запросу '{query}': {e}")
+        return pd.DataFrame()
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from src.metrics import prometheus_text
+from src.queries import QUERY_TYPES, Dataset, execute_query
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/server.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL = 60
+RELOAD_CHECK_INTERVAL = 2
+
+
+class DatasetHolder:
+    """
+    Держит загруженный набор данных и перезагружает его, когда файл изменился на диске.
+
+    Проверка mtime выполняется не чаще раза в check_interval секунд. Перезагрузка идет
+    в фоновом потоке, запросы до ее окончания обслуживаются предыдущей версией данных.
+    """
+
+    def __init__(self, file_path: str, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.file_path = file_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._checked_at = time.monotonic()
+        self._mtime = os.stat(file_path).st_mtime_ns
+        # Набор данных и его версия меняются одним присваиванием, поэтому читатели не видят их рассогласованными
+        self._state = (Dataset.from_file(file_path), 0)
+
+    def get(self) -> tuple[Dataset, int]:
+        """Возвращает текущий набор данных и его версию."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval and not self._reloading:
+                    self._checked_at = now
+                    try:
+                        mtime = os.stat(self.file_path).st_mtime_ns
+                    except OSError as e:
+                        logger.error(f"Файл {self.file_path} недоступен: {e}")
+                        mtime = self._mtime
+                    if mtime != self._mtime:
+                        self._reloading = True
+                        threading.Thread(target=self._reload, args=(mtime,), daemon=True).start()
+        return self._state
+
+    def _reload(self, mtime: int) -> None:
+        """Загружает новую версию набора данных."""
+        try:
+            dataset = Dataset.from_file(self.file_path)
+            if dataset.df.empty:
+                raise ValueError("Нет данных")
+            with self._lock:
+                version = self._state[1] + 1
+                self._state, self._mtime = (dataset, version), mtime
+            logger.info(f"Данные перезагружены из {self.file_path}, версия {version}")
+        except Exception as e:
+            logger.error(f"Ошибка перезагрузки {self.file_path}: {e}")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+
+class ResponseCache:
+    """LRU-кэш готовых ответов с ограниченным временем жизни."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[tuple[int, bytes]]:
+        """Возвращает закэшированный ответ или None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, response: tuple[int, bytes]) -> None:
+        """Сохраняет ответ, вытесняя давно не использовавшиеся записи."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class PooledHTTPServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP-сервер: каждое соединение обслуживается своим потоком, а запросы к данным
+    выполняются в пуле потоков фиксированного размера. Открытые keep-alive соединения
+    не занимают потоки пула, пока клиент не прислал запрос.
+    """
+
+    def __init__(self, address: tuple, handler: type, holder: DatasetHolder, workers: int = 8):
+        super().__init__(address, handler)
+        self.holder = holder
+        self.cache = ResponseCache()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов: GET /home_page, /p2p_transfers, /category_report?category=...&date=...,
+    /cube_report?start_date=...&end_date=...&category=...&card=...&by=..., /search?query=...&mode=...,
+    /health, /metrics.
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = 5
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query_type = url.path.strip("/")
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        dataset, version = self.server.holder.get()
+
+        if query_type == "health":
+            self._send(200, json.dumps({"status": "ok", "version": version, "rows": len(dataset.df)}).encode())
+            return
+        if query_type == "metrics":
+            self._send(200, prometheus_text().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+            return
+        if query_type not in QUERY_TYPES:
+            self._send(404, json.dumps({"error": "Неизвестный адрес"}, ensure_ascii=False).encode("utf-8"))
+            return
+
+        key = (version, query_type, tuple(sorted(params.items())))
+        cached = self.server.cache.get(key)
+        if cached is None:
+            response = self.server.executor.submit(execute_query, dataset, dict(params, type=query_type)).result()
+            status = 200 if response["status"] == "ok" else 400
+            cached = (status, json.dumps(response, ensure_ascii=False, default=str).encode("utf-8"))
+            if status == 200:
+                self.server.cache.put(key, cached)
+        self._send(*cached)
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json; charset=utf-8") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: any) -> None:
+        logger.debug(format % args)
+
+
+def create_server(file_path: str, host: str = "127.0.0.1", port: int = 8000, workers: int = 8) -> PooledHTTPServer:
+    """
+    Загружает набор данных и создает HTTP-сервер. Для запуска вызовите serve_forever().
+    """
+    return PooledHTTPServer((host, port), RequestHandler, DatasetHolder(file_path), workers)
+
+
+def serve(file_path: str, host: str = "127.0.0.1", port: int = 8000, workers: int = 8) -> None:
+    """Запускает HTTP-сервер до прерывания с клавиатуры."""
+    server = create_server(file_path, host, port, workers)
+    logger.info(f"Сервер запущен на http://{host}:{server.server_address[1]}")
+    print(f"Сервер запущен на http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
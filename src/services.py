@@ -1,37 +1,114 @@
 import json
 import logging
 import re
+import sys
+from typing import TextIO
 
+import numpy as np
 import pandas as pd
 
+from src.metrics import span
+from src.storage import SQLiteStore
+from src.utils import P2P_PATTERN, to_records
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler("logs/services.log", mode="w")
+file_handler = logging.FileHandler("logs/services.log", mode="w", delay=True)
 file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 
+P2P_REGEX = re.compile(P2P_PATTERN)
+
+
+def match_unique(values: pd.Series, pattern: re.Pattern) -> np.ndarray:
+    """
+    Проверяет регулярное выражение один раз для каждого уникального значения
+    и возвращает маску совпадений для всех строк. Пропуски не совпадают.
+    """
+    codes, uniques = pd.factorize(values)
+    matched = np.fromiter(
+        (isinstance(value, str) and pattern.match(value) is not None for value in uniques),
+        dtype=bool,
+        count=len(uniques),
+    )
+    return np.append(matched, False)[codes]
+
+
+def select_p2p_transfers(df: pd.DataFrame) -> pd.DataFrame:
+    """Отбирает переводы физическим лицам из DataFrame транзакций."""
+    transfers = df[(df["Категория"] == "Переводы").to_numpy()]
+    return transfers[match_unique(transfers["Описание"], P2P_REGEX)]
+
 
 def find_p2p_transfers(df: pd.DataFrame) -> str | None:
     """
     Функция находит переводы физическим лицам.
     Возвращает JSON со всеми такими транзакциями.
+    В метриках учитывается количество найденных переводов, а не длина JSON.
     """
-    try:
-        if not isinstance(df, pd.DataFrame):
-            logger.error(f"Не корректный формат данных.")
-            raise ValueError()
+    with span("find_p2p_transfers") as measure:
+        try:
+            if isinstance(df, SQLiteStore):
+                result = df.p2p_transfers()
+                measure.rows = len(result)
+                return json.dumps(result, ensure_ascii=False, indent=2)
+            if not isinstance(df, pd.DataFrame):
+                logger.error(f"Не корректный формат данных.")
+                raise ValueError()
 
-        pattern = re.compile(r"^[А-ЯЁ][а-яё]+\s[А-ЯЁ]\.$")
-        p2p_transfers = df[(df["Категория"] == "Переводы") & df["Описание"].str.match(pattern, na=False)]
+            p2p_transfers = select_p2p_transfers(df)
+            measure.rows = len(p2p_transfers)
 
-        if not p2p_transfers.empty:
-            result = p2p_transfers.to_dict(orient="records")
-            return json.dumps(result, ensure_ascii=False, indent=2)
+            if not p2p_transfers.empty:
+                result = to_records(p2p_transfers)
+                return json.dumps(result, ensure_ascii=False, indent=2)
+
+            logger.info("Нет подходящих P2P переводов.")
+            return json.dumps([], ensure_ascii=False, indent=2)
+
+        except Exception as e:
+            logger.error(f"Ошибка при поиске P2P переводов: {e}")
+            return None
+
+
+def write_p2p_transfers(
+    df: pd.DataFrame, output: str | TextIO | None = None, chunk_size: int = 10_000
+) -> int | None:
+    """
+    Записывает переводы физическим лицам в формате JSON Lines по одной транзакции в строке.
+
+    Записи формируются и пишутся частями по chunk_size строк, без построения общего списка и JSON-строки;
+    из SQLiteStore части читаются отдельными запросами.
+
+    :param df: DataFrame с транзакциями или SQLiteStore.
+    :param output: Путь к файлу или открытый текстовый поток. По умолчанию stdout.
+    :param chunk_size: Количество строк, преобразуемых за один шаг.
+    :return: Количество записанных транзакций или None при ошибке.
+    """
+    try:
+        if isinstance(df, SQLiteStore):
+            chunks = df.iter_p2p_transfers(chunk_size)
+        elif isinstance(df, pd.DataFrame):
+            transfers = select_p2p_transfers(df)
+            chunks = (to_records(transfers.iloc[i : i + chunk_size]) for i in range(0, len(transfers), chunk_size))
+        else:
+            raise ValueError("Не корректный формат данных.")
 
-        logger.info("Нет подходящих P2P переводов.")
-        return json.dumps([], ensure_ascii=False, indent=2)
+        stream = open(output, "w", encoding="utf-8") if isinstance(output, str) else output or sys.stdout
+        count = 0
+        try:
+            for records in chunks:
+                for record in records:
+                    stream.write(json.dumps(record, ensure_ascii=False, default=str))
+                    stream.write("\n")
+                count += len(records)
+        finally:
+            if isinstance(output, str):
+                stream.close()
+        logger.info(f"Записано P2P переводов: {count}")
+        return count
 
     except Exception as e:
-        logger.error(f"Ошибка при поиске P2P переводов: {e}")
+        logger.error(f"Ошибка при записи P2P переводов: {e}")
         return None
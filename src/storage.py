@@ -0,0 +1,183 @@
+import logging
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from src.utils import DATE_FORMAT, P2P_PATTERN, TRANSACTION_COLUMNS, get_period, normalize_transactions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/storage.log", mode="a", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+DB_PATH = "data/operations.sqlite"
+
+SQL_COLUMNS = {
+    "Дата операции": "op_date",
+    "Номер карты": "card",
+    "Статус": "status",
+    "Сумма операции": "amount",
+    "Валюта операции": "currency",
+    "Сумма платежа": "payment_amount",
+    "Валюта платежа": "payment_currency",
+    "Кэшбэк": "cashback",
+    "Категория": "category",
+    "MCC": "mcc",
+    "Описание": "description",
+}
+
+SQL_TYPES = {"amount": "REAL", "payment_amount": "REAL", "cashback": "REAL", "mcc": "REAL"}
+
+SQL_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@lru_cache(maxsize=65536)
+def _regexp(pattern: str, value: Optional[str]) -> bool:
+    """Функция REGEXP для SQLite. Результат кэшируется по уникальным строкам описания."""
+    return value is not None and re.match(pattern, value) is not None
+
+
+class SQLiteStore:
+    """
+    Хранилище транзакций во встроенной базе SQLite с индексами по дате, категории, карте и описанию.
+
+    Функции spending_by_category, find_p2p_transfers, get_card_summary и get_top_transactions
+    принимают SQLiteStore вместо DataFrame и выполняют фильтры и агрегаты в базе,
+    поэтому память процесса не растет вместе с историей операций.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.create_function("REGEXP", 2, _regexp, deterministic=True)
+        columns = ", ".join(f"{name} {SQL_TYPES.get(name, 'TEXT')}" for name in SQL_COLUMNS.values())
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS transactions ({columns})")
+
+    def load(self, batches: Iterable[pd.DataFrame] | pd.DataFrame, replace: bool = True) -> int:
+        """
+        Загружает транзакции в базу, приводя суммы к рублям, и строит индексы.
+
+        :param batches: DataFrame или итератор пакетов (например, src.stream.iter_batches).
+        :param replace: Удалить ранее загруженные строки.
+        :return: Количество загруженных строк.
+        """
+        if isinstance(batches, pd.DataFrame):
+            batches = [batches]
+        rows = 0
+        with self._lock, self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM transactions")
+            for batch in batches:
+                frame = self._to_sql_frame(batch)
+                placeholders = ", ".join("?" for _ in frame.columns)
+                self.connection.executemany(
+                    f"INSERT INTO transactions ({', '.join(frame.columns)}) VALUES ({placeholders})",
+                    frame.itertuples(index=False, name=None),
+                )
+                rows += len(frame)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_date ON transactions (op_date)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_category_date ON transactions (category, op_date)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_card ON transactions (card)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_description ON transactions (description)")
+            self.connection.execute("ANALYZE")
+        logger.info(f"В {self.path} загружено строк: {rows}")
+        return rows
+
+    @staticmethod
+    def _to_sql_frame(batch: pd.DataFrame) -> pd.DataFrame:
+        """Приводит пакет к колонкам и типам таблицы transactions и пересчитывает суммы в рубли."""
+        # src.fx импортирует src.views, который сам зависит от этого модуля
+        from src.fx import convert_currency
+
+        df = convert_currency(normalize_transactions(batch))
+        df = df[[name for name in TRANSACTION_COLUMNS if name in df.columns]]
+        df = df.astype(object).where(df.notna(), None)
+        if "Дата операции" in df.columns:
+            df["Дата операции"] = [
+                value.strftime(SQL_DATE_FORMAT) if value is not None else None for value in df["Дата операции"]
+            ]
+        return df.rename(columns=SQL_COLUMNS)
+
+    def query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """Выполняет запрос и возвращает результат с исходными названиями колонок."""
+        with self._lock:
+            df = pd.read_sql_query(sql, self.connection, params=params)
+        return df.rename(columns={value: key for key, value in SQL_COLUMNS.items()})
+
+    def spending_by_category(self, category: str, date: Optional[str] = None) -> pd.DataFrame:
+        """Траты по категории за последние три месяца (аналог reports.spending_by_category)."""
+        start_date, end_date = get_period(date)
+        df = self.query(
+            f"SELECT {', '.join(SQL_COLUMNS.values())} FROM transactions "
+            "WHERE category = ? AND op_date >= ? AND op_date <= ? AND amount < 0 ORDER BY rowid",
+            (category, start_date.strftime(SQL_DATE_FORMAT), end_date.strftime(SQL_DATE_FORMAT)),
+        )
+        df["Дата операции"] = pd.to_datetime(df["Дата операции"], format=SQL_DATE_FORMAT)
+        return df
+
+    def p2p_transfers(self) -> list:
+        """Переводы физическим лицам (аналог services.find_p2p_transfers)."""
+        return [record for records in self.iter_p2p_transfers(chunk_size=-1) for record in records]
+
+    def iter_p2p_transfers(self, chunk_size: int = 10_000) -> Iterator[list]:
+        """
+        Переводы физическим лицам частями по chunk_size записей (-1 - одной частью).
+
+        Каждая часть - отдельный запрос после последнего rowid предыдущей части,
+        поэтому блокировка базы не удерживается, пока вызывающий код обрабатывает записи.
+        """
+        last_rowid = 0
+        while True:
+            df = self.query(
+                f"SELECT rowid, {', '.join(SQL_COLUMNS.values())} FROM transactions "
+                "WHERE category = 'Переводы' AND rowid > ? AND REGEXP(?, description) ORDER BY rowid LIMIT ?",
+                (last_rowid, P2P_PATTERN, chunk_size),
+            )
+            if df.empty:
+                return
+            last_rowid = int(df["rowid"].iloc[-1])
+            df = df.drop(columns="rowid")
+            df["Дата операции"] = pd.to_datetime(df["Дата операции"], format=SQL_DATE_FORMAT).dt.strftime(DATE_FORMAT)
+            yield df.to_dict(orient="records")
+            if chunk_size < 0 or len(df) < chunk_size:
+                return
+
+    def card_summary(self) -> list:
+        """Сводка расходов по картам (аналог views.get_card_summary)."""
+        df = self.query(
+            "SELECT card, -SUM(amount) AS total FROM transactions "
+            "WHERE amount < 0 AND card IS NOT NULL GROUP BY card ORDER BY card"
+        )
+        return [
+            {"last_digits": card, "total_spent": round(total, 2), "cashback": int(total // 100)}
+            for card, total in zip(df["Номер карты"], df["total"])
+        ]
+
+    def top_transactions(self, n: int = 5) -> list:
+        """Топ-n транзакций по сумме (аналог views.get_top_transactions)."""
+        df = self.query(
+            "SELECT op_date, amount, category, description FROM transactions "
+            "WHERE amount IS NOT NULL ORDER BY amount DESC, rowid LIMIT ?",
+            (n,),
+        )
+        return [
+            {
+                "date": pd.Timestamp(date).strftime(DATE_FORMAT) if date else date,
+                "amount": round(amount, 2),
+                "category": category,
+                "description": description,
+            }
+            for date, amount, category, description in df.itertuples(index=False, name=None)
+        ]
+
+    def close(self) -> None:
+        """Закрывает соединение с базой."""
+        self.connection.close()
@@ -0,0 +1,127 @@
+import json
+import logging
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from src.reports import spending_by_category
+from src.services import select_p2p_transfers
+from src.utils import card_suffix, normalize_transactions, to_records
+from src.views import get_top_transactions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler("logs/stream.log", mode="w", delay=True)
+file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(file_formatter)
+logger.addHandler(file_handler)
+
+BATCH_SIZE = 50_000
+
+
+def iter_batches(
+    file_path: str, batch_size: int = BATCH_SIZE, columns: Optional[list] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Построчно читает EXCEL-файл в режиме read-only и возвращает DataFrame-пакеты по batch_size строк.
+
+    В памяти одновременно находится только один пакет, поэтому потребление памяти
+    не зависит от длины истории операций.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name) for name in header]
+        positions = [header.index(name) for name in columns if name in header] if columns else list(range(len(header)))
+        names = [header[i] for i in positions]
+
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in positions])
+            if len(batch) >= batch_size:
+                yield _make_batch(batch, names)
+                batch = []
+        if batch:
+            yield _make_batch(batch, names)
+    finally:
+        workbook.close()
+
+
+def _make_batch(rows: list, names: list) -> pd.DataFrame:
+    """Собирает пакет строк в типизированный DataFrame. Суммы разбираются только в normalize_transactions."""
+    return normalize_transactions(pd.DataFrame(rows, columns=names))
+
+
+def stream_card_summary(batches: Iterable[pd.DataFrame]) -> list | dict:
+    """
+    Сводка расходов по картам, накапливаемая по пакетам (аналог get_card_summary).
+    """
+    try:
+        totals = pd.Series(dtype=float)
+        for batch in batches:
+            cards = card_suffix(batch["Номер карты"])
+            spent = batch["Сумма операции"] < 0
+            part = batch.loc[spent, "Сумма операции"].groupby(cards[spent]).sum()
+            totals = totals.add(part, fill_value=0)
+        totals = totals.abs().sort_index()
+        return [
+            {"last_digits": card, "total_spent": round(total, 2), "cashback": int(total // 100)}
+            for card, total in totals.items()
+        ]
+    except Exception as e:
+        logger.error(f"Ошибка формирования сводки по картам: {e}")
+        return {}
+
+
+def stream_top_transactions(batches: Iterable[pd.DataFrame], n: int = 5) -> list | dict:
+    """
+    Топ-n транзакций по сумме, накапливаемый по пакетам (аналог get_top_transactions).
+    """
+    try:
+        top = None
+        for batch in batches:
+            candidates = batch.nlargest(n, "Сумма операции")
+            top = candidates if top is None else pd.concat([top, candidates]).nlargest(n, "Сумма операции")
+        if top is None:
+            return []
+        return get_top_transactions(top)
+    except Exception as e:
+        logger.error(f"Ошибка формирования топа транзакций: {e}")
+        return {}
+
+
+def stream_p2p_transfers(batches: Iterable[pd.DataFrame]) -> str | None:
+    """
+    Поиск переводов физическим лицам по пакетам (аналог find_p2p_transfers).
+    В памяти хранятся только найденные переводы.
+    """
+    try:
+        result = []
+        for batch in batches:
+            result.extend(to_records(select_p2p_transfers(batch)))
+        return json.dumps(result, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.error(f"Ошибка при поиске P2P переводов: {e}")
+        return None
+
+
+def stream_spending_by_category(
+    batches: Iterable[pd.DataFrame], category: str, date: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Траты по категории за последние три месяца, отбираемые по пакетам (аналог spending_by_category).
+    Отчет в файл не сохраняется; при необходимости передайте результат в src.reports.write_report.
+    """
+    try:
+        parts = [spending_by_category.__wrapped__(batch, category, date) for batch in batches]
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
+    except Exception as e:
+        logger.error(f"Ошибка при фильтрации трат по категории '{category}': {e}")
+        return pd.DataFrame()
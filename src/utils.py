@@ -1,23 +1,68 @@
+import glob
 import json
 import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Optional, Protocol, TypeVar
 
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from src.metrics import timed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler("logs/utils.log", mode="w")
+file_handler = logging.FileHandler("logs/utils.log", mode="w", delay=True)
 file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 
 
-def file_reader(file_path: str = "") -> pd.DataFrame:
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+TRANSACTION_COLUMNS = [
+    "Дата операции",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+]
+
+CATEGORICAL_COLUMNS = ["Номер карты", "Статус", "Валюта операции", "Валюта платежа", "Категория"]
+
+AMOUNT_COLUMNS = ["Сумма операции", "Сумма платежа", "Кэшбэк"]
+
+P2P_PATTERN = r"^[А-ЯЁ][а-яё]+\s[А-ЯЁ]\.$"
+
+# Колонки, по которым считается отпечаток строк сохраненных агрегатов, куба и индекса описаний
+FINGERPRINT_COLUMNS = TRANSACTION_COLUMNS
+
+
+@timed()
+def file_reader(file_path: str = "", columns: Optional[list] = None) -> pd.DataFrame:
     """
     Функция считывает данные из EXCEL-файла и возвращает dataframe.
+    Если передан список columns, считываются только эти колонки.
+
+    Также поддерживаются файлы .pkl и каталог хранилища, заполняемого src.ingest
+    (сегменты part-*.pkl объединяются в один DataFrame).
     """
     try:
-        df = pd.read_excel(file_path)
-        return df
+        if os.path.isdir(file_path):
+            segments = sorted(glob.glob(os.path.join(file_path, "part-*.pkl")))
+            df = pd.concat([pd.read_pickle(segment) for segment in segments], ignore_index=True)
+        elif file_path.endswith(".pkl"):
+            df = pd.read_pickle(file_path)
+        else:
+            usecols = (lambda name: name in columns) if columns else None
+            return pd.read_excel(file_path, usecols=usecols)
+        return df[[name for name in df.columns if name in columns]] if columns else df
     except Exception as e:
         logger.error(f"Ошибка при чтении файла {file_path}: {e}")
         return pd.DataFrame()
@@ -33,3 +78,140 @@ def load_user_settings(file_path: str = "") -> list:
     except Exception as e:
         logger.error(f"Ошибка загрузки user_settings.json: {e}")
         return []
+
+
+def get_period(date: Optional[str] = None) -> tuple[datetime, datetime]:
+    """
+    Возвращает границы трехмесячного периода отчета, заканчивающегося в конце указанного дня.
+
+    :param date: Опциональная дата в формате 'DD.MM.YYYY'. Если не указана, берется текущая дата.
+    :return: Кортеж (начало периода, конец периода).
+    """
+    end_date = datetime.strptime(date, "%d.%m.%Y") if date else datetime.today()
+    end_date = end_date.replace(hour=23, minute=59, second=59)
+    return end_date - timedelta(days=90), end_date
+
+
+@timed()
+def parse_dates(dates: pd.Series) -> pd.Series:
+    """
+    Приводит колонку дат к datetime64. Уже приведенная колонка возвращается без изменений.
+    """
+    if is_datetime64_any_dtype(dates):
+        return dates
+    return pd.to_datetime(dates, format=DATE_FORMAT, errors="coerce")
+
+
+def parse_amounts(amounts: pd.Series) -> pd.Series:
+    """
+    Приводит колонку сумм к float64. Поддерживает строки с десятичной запятой,
+    нечисловые значения заменяются на NaN.
+    """
+    if is_numeric_dtype(amounts):
+        return amounts.astype(float)
+    return pd.to_numeric(amounts.astype(str).str.replace(",", "."), errors="coerce").astype(float)
+
+
+def card_suffix(cards: pd.Series) -> pd.Series:
+    """Возвращает последние 4 символа номеров карт."""
+    return cards.astype(str).str[-4:]
+
+
+def normalize_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит DataFrame транзакций к типизированному виду один раз при загрузке.
+
+    Даты операций приводятся к datetime64, суммы к float64, номера карт заменяются
+    последними 4 цифрами, повторяющиеся строковые колонки хранятся как category.
+    Некорректные даты и суммы заменяются на NaN/NaT, их количество пишется в лог.
+    Исходный DataFrame не изменяется. Повторная нормализация ничего не меняет.
+    """
+    try:
+        result = df.copy(deep=False)
+        parsers = [("Дата операции", parse_dates)] + [(column, parse_amounts) for column in AMOUNT_COLUMNS]
+        for column, parser in parsers:
+            if column in result.columns:
+                result[column] = parser(result[column])
+                invalid = int((result[column].isna() & df[column].notna()).sum())
+                if invalid:
+                    logger.error(f"Некорректных значений в колонке '{column}': {invalid}, заменены на пустые")
+        if "Номер карты" in result.columns and not isinstance(result["Номер карты"].dtype, pd.CategoricalDtype):
+            result["Номер карты"] = card_suffix(result["Номер карты"])
+        for column in CATEGORICAL_COLUMNS:
+            if column in result.columns:
+                result[column] = result[column].astype("category")
+        return result
+    except Exception as e:
+        logger.error(f"Ошибка нормализации данных: {e}")
+        return pd.DataFrame()
+
+
+class PersistentState(Protocol):
+    """Сохраняемое состояние, которое строится по DataFrame и дополняется новыми строками."""
+
+    rows: int
+    fingerprint: Optional[int]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> Any:
+        """Строит состояние по всему DataFrame."""
+
+    @classmethod
+    def load(cls, path: str) -> Any:
+        """Загружает состояние из файла или возвращает None."""
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Добавляет новые строки."""
+
+    def save(self, path: str) -> None:
+        """Сохраняет состояние в файл."""
+
+
+StateT = TypeVar("StateT", bound=PersistentState)
+
+
+def rows_fingerprint(df: pd.DataFrame) -> int:
+    """Отпечаток строк DataFrame по всем колонкам транзакций с учетом порядка строк."""
+    columns = [name for name in FINGERPRINT_COLUMNS if name in df.columns]
+    return int(pd.util.hash_pandas_object(df[columns].reset_index(drop=True), index=True).sum())
+
+
+def restore_state(cls: type[StateT], df: pd.DataFrame, path: Optional[str] = None) -> StateT:
+    """
+    Загружает сохраненное состояние (например, агрегаты главной страницы), дополняет его строками df,
+    добавленными в конец после сохранения, и сохраняет снова.
+
+    Если файла нет или начало df не совпадает со строками, по которым строилось состояние,
+    оно строится по всему df заново. Без path состояние только строится.
+
+    :param cls: Класс состояния (см. PersistentState).
+    :param df: Нормализованный DataFrame с транзакциями.
+    :param path: Путь к файлу состояния.
+    :return: Состояние, соответствующее всем строкам df.
+    """
+    if path is None:
+        return cls.from_frame(df)
+    state = cls.load(path)
+    fingerprint = getattr(state, "fingerprint", None)
+    if state is not None and state.rows <= len(df) and fingerprint == rows_fingerprint(df.iloc[: state.rows]):
+        if state.rows == len(df):
+            return state
+        logger.info(f"{cls.__name__}: добавлено строк {len(df) - state.rows} к сохраненным {state.rows}")
+        state.update(df.iloc[state.rows :])
+    else:
+        logger.info(f"{cls.__name__}: сохраненное состояние не подходит, строится заново")
+        state = cls.from_frame(df)
+    state.fingerprint = rows_fingerprint(df)
+    state.save(path)
+    return state
+
+
+def to_records(df: pd.DataFrame) -> list:
+    """
+    Преобразует DataFrame в список словарей для JSON, форматируя даты как в исходном файле.
+    """
+    result = df.copy(deep=False)
+    for column in result.columns:
+        if is_datetime64_any_dtype(result[column]):
+            result[column] = result[column].dt.strftime(DATE_FORMAT)
+    return result.to_dict(orient="records")
@@ -1,25 +1,60 @@
 import json
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from typing import TYPE_CHECKING, Optional
 
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
-from src.utils import load_user_settings
+from src.metrics import timed
+from src.storage import SQLiteStore
+from src.utils import DATE_FORMAT, card_suffix, load_user_settings
+
+if TYPE_CHECKING:
+    from src.aggregates import HomePageAggregates
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler("logs/views.log", mode="w")
+file_handler = logging.FileHandler("logs/views.log", mode="w", delay=True)
 file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 file_handler.setFormatter(file_formatter)
 logger.addHandler(file_handler)
 
-load_dotenv(".env")
+
+FIXER_URL = "https://api.apilayer.com/fixer/latest"
+MARKETSTACK_URL = "http://api.marketstack.com/v1/eod"
+REQUEST_TIMEOUT = 5
+MARKET_DATA_DEADLINE = 10
+HTTP_POOL_SIZE = 8
+
+MARKET_CACHE_PATH = "data/market_cache.json"
+MARKET_CACHE_TTL = {"fixer": 60 * 60, "marketstack": 6 * 60 * 60}
+MARKET_CACHE_MAX_STALE = 7 * 24 * 60 * 60
+MARKET_CACHE_MAX_ENTRIES = 64
+
+_session = None
+_session_lock = threading.Lock()
+_market_cache = None
+_market_cache_lock = threading.Lock()
+_env_loaded = False
 
 
-def home_page(df: pd.DataFrame) -> str | None:
+def load_env() -> None:
+    """Загружает переменные окружения из .env при первом обращении к API."""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv(".env")
+        _env_loaded = True
+
+
+@timed()
+def home_page(df: pd.DataFrame, aggregates: Optional["HomePageAggregates"] = None) -> str | None:
     """
     Формирует и возвращает данные домашней страницы в формате JSON.
 
@@ -27,17 +62,24 @@ def home_page(df: pd.DataFrame) -> str | None:
     1. Считывает данные операций из файла Excel.
     2. Определяет приветствие в зависимости от текущего времени суток.
     3. Генерирует сводку по картам и выводит топ-5 транзакций.
-    4. Загружает пользовательские настройки и получает курсы валют и цены акций.
+    4. Загружает пользовательские настройки и параллельно получает курсы валют и цены акций.
     5. Возвращает итоговый результат в формате JSON.
+
+    Если переданы aggregates, сводка по картам и топ транзакций берутся из них без обхода df.
     """
     try:
         greeting = get_greeting()
-        card_summary = get_card_summary(df)
-        top_transactions = get_top_transactions(df)
+        if aggregates is not None:
+            card_summary = aggregates.card_summary()
+            top_transactions = aggregates.top_transactions()
+        else:
+            card_summary = get_card_summary(df)
+            top_transactions = get_top_transactions(df)
 
         user_settings = load_user_settings("user_settings.json")
-        currency_rates = get_currency_rates(user_settings.get("user_currencies"))
-        stock_prices = get_stock_prices(user_settings.get("user_stocks"))
+        currency_rates, stock_prices = get_market_data(
+            user_settings.get("user_currencies"), user_settings.get("user_stocks")
+        )
         result = {
             "greeting": greeting,
             "cards": card_summary,
@@ -64,14 +106,19 @@ def get_greeting() -> str:
         return "Доброй ночи"
 
 
+@timed()
 def get_card_summary(df: pd.DataFrame) -> list | dict:
     """
-    Создает сводку расходов по номерам карт.
+    Создает сводку расходов по номерам карт. Переданный DataFrame не изменяется.
     """
     try:
-        df["Номер карты"] = df["Номер карты"].astype(str).str[-4:]
-        df = df[df["Сумма операции"] < 0]
-        summary = df.groupby("Номер карты")["Сумма операции"].sum().abs()
+        if isinstance(df, SQLiteStore):
+            return df.card_summary()
+        cards = df["Номер карты"]
+        if not isinstance(cards.dtype, pd.CategoricalDtype):
+            cards = card_suffix(cards)
+        spent = df["Сумма операции"] < 0
+        summary = df.loc[spent, "Сумма операции"].groupby(cards[spent], observed=True).sum().abs()
         return [
             {"last_digits": card, "total_spent": round(total, 2), "cashback": int(total // 100)}
             for card, total in summary.items()
@@ -81,15 +128,22 @@ def get_card_summary(df: pd.DataFrame) -> list | dict:
         return {}
 
 
+@timed()
 def get_top_transactions(df: pd.DataFrame) -> list | dict:
     """
     Функция возвращает топ 5 транзакций.
     """
     try:
+        if isinstance(df, SQLiteStore):
+            return df.top_transactions(5)
         top_transactions = df.nlargest(5, "Сумма операции")
         return [
             {
-                "date": row["Дата операции"],
+                "date": (
+                    row["Дата операции"].strftime(DATE_FORMAT)
+                    if isinstance(row["Дата операции"], pd.Timestamp)
+                    else row["Дата операции"]
+                ),
                 "amount": round(row["Сумма операции"], 2),
                 "category": row["Категория"],
                 "description": row["Описание"],
@@ -101,16 +155,34 @@ def get_top_transactions(df: pd.DataFrame) -> list | dict:
         return {}
 
 
-def get_currency_rates(currencies: list) -> list | dict:
+def get_session() -> requests.Session:
+    """
+    Возвращает общую HTTP-сессию с пулом keep-alive соединений.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+@timed()
+def get_currency_rates(currencies: list, timeout: float = REQUEST_TIMEOUT) -> list | dict:
     """
     Функция для получения курсов валют через API Layer.
     """
+    if not currencies:
+        return []
+    load_env()
     api_key = os.getenv("API_KEY_LAYER")
     headers = {"apikey": api_key}
     base_currency = "RUB"
-    url = f"https://api.apilayer.com/fixer/latest?base={base_currency}&symbols={','.join(currencies)}"
+    params = {"base": base_currency, "symbols": ",".join(currencies)}
     try:
-        response = requests.get(url, headers=headers)
+        response = get_session().get(FIXER_URL, params=params, headers=headers, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         return [
@@ -125,28 +197,223 @@ def get_currency_rates(currencies: list) -> list | dict:
         return {}
 
 
-def get_stock_prices(stocks: list) -> list:
+@timed()
+def get_stock_prices(stocks: list, timeout: float = REQUEST_TIMEOUT) -> list:
     """
     Получение цен на акции через API Marketstack.
+
+    Все тикеры запрашиваются одним запросом. Тикеры, для которых в ответе нет данных,
+    запрашиваются по одному параллельно.
     """
+    if not stocks:
+        return []
+    load_env()
     api_key = os.getenv("API_KEY_MARKETSTACK")
-    url = "http://api.marketstack.com/v1/eod"
-    prices = []
+    found = {}
+
+    try:
+        params = {"access_key": api_key, "symbols": ",".join(stocks), "limit": len(stocks)}
+        response = get_session().get(MARKETSTACK_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        for row in response.json().get("data") or []:
+            if row.get("symbol") in stocks and row.get("symbol") not in found:
+                found[row["symbol"]] = round(row.get("close", 0), 2)
+    except Exception as e:
+        logger.error(f"Ошибка пакетного получения цен акций: {e}")
+
+    missing = [stock for stock in stocks if stock not in found]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), HTTP_POOL_SIZE)) as executor:
+            for stock, price in zip(missing, executor.map(lambda s: _get_stock_price(s, api_key, timeout), missing)):
+                if price is not None:
+                    found[stock] = price
 
-    for stock in stocks:
-        params = {"access_key": api_key, "symbols": stock, "limit": 1}
+    return [{"stock": stock, "price": found[stock]} for stock in stocks if stock in found]
+
+
+def _get_stock_price(stock: str, api_key: str | None, timeout: float) -> float | None:
+    """
+    Получение цены одной акции через API Marketstack.
+    """
+    params = {"access_key": api_key, "symbols": stock, "limit": 1}
+    try:
+        response = get_session().get(MARKETSTACK_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        if "data" in data and data["data"]:
+            return round(data["data"][0].get("close", 0), 2)
+        logger.error(f"Нет данных о цене для акции {stock}. Ответ API: {data}")
+    except Exception as e:
+        logger.error(f"Ошибка получения цены акции {stock}: {e}")
+    return None
 
+
+def get_market_data(
+    currencies: list, stocks: list, deadline: float = MARKET_DATA_DEADLINE, use_cache: bool = True
+) -> tuple[list | dict, list]:
+    """
+    Параллельно получает курсы валют и цены акций.
+
+    При use_cache=True данные берутся из MarketDataCache и обновляются только по истечении TTL.
+
+    Если данные не получены за deadline секунд, вместо них возвращаются пустые значения,
+    а ожидание зависших запросов не задерживает ответ.
+    """
+    cache = get_market_cache() if use_cache else None
+    executor = ThreadPoolExecutor(max_workers=2)
+    if cache is not None:
+        # Ключ не зависит от порядка и повторов символов в настройках, запрос идет по тому же набору
+        currencies, stocks = tuple(sorted(set(currencies or []))), tuple(sorted(set(stocks or [])))
+        rates_future = executor.submit(
+            cache.get, ("fixer", "RUB", currencies), lambda: get_currency_rates(list(currencies))
+        )
+        prices_future = executor.submit(
+            cache.get, ("marketstack", "", stocks), lambda: get_stock_prices(list(stocks))
+        )
+    else:
+        rates_future = executor.submit(get_currency_rates, currencies)
+        prices_future = executor.submit(get_stock_prices, stocks)
+    done, _ = wait([rates_future, prices_future], timeout=deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    if rates_future in done:
+        currency_rates = rates_future.result()
+    else:
+        logger.error("Превышено время ожидания курсов валют")
+        currency_rates = {}
+    if prices_future in done:
+        stock_prices = prices_future.result()
+    else:
+        logger.error("Превышено время ожидания цен акций")
+        stock_prices = []
+    return currency_rates, stock_prices
+
+
+class MarketDataCache:
+    """
+    Кэш курсов валют и цен акций с TTL, LRU-вытеснением и сохранением на диск.
+
+    Ключ записи - (провайдер, базовая валюта, набор тикеров). Свежая запись возвращается сразу.
+    Устаревшая запись (не старше max_stale) тоже возвращается сразу, а обновление
+    запускается в фоновом потоке (stale-while-revalidate). Пустые ответы API не кэшируются.
+    """
+
+    def __init__(
+        self,
+        path: str | None = MARKET_CACHE_PATH,
+        ttl: dict | None = None,
+        max_stale: float = MARKET_CACHE_MAX_STALE,
+        max_entries: int = MARKET_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl or MARKET_CACHE_TTL
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+        self._load()
+
+    def get(self, key: tuple, loader: callable) -> any:
+        """
+        Возвращает значение по ключу, при необходимости загружая его через loader.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = now - entry["fetched_at"]
+                if age < self.ttl.get(key[0], 0):
+                    self._stats["hits"] += 1
+                    return entry["value"]
+                if age < self.ttl.get(key[0], 0) + self.max_stale:
+                    self._stats["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                    return entry["value"]
+            self._stats["misses"] += 1
+
+        value = loader()
+        self._store(key, value)
+        return value
+
+    def stats(self) -> dict:
+        """Возвращает счетчики попаданий, промахов и фоновых обновлений."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def clear(self) -> None:
+        """Очищает кэш в памяти и на диске."""
+        with self._lock:
+            self._entries.clear()
+        self._save()
+
+    def _refresh(self, key: tuple, loader: callable) -> None:
+        """Обновляет устаревшую запись в фоновом потоке."""
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            if self._store(key, loader()):
+                with self._lock:
+                    self._stats["refreshes"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key: tuple, value: any) -> bool:
+        """Сохраняет непустое значение, вытесняя давно не использовавшиеся записи."""
+        if not value:
+            with self._lock:
+                self._stats["errors"] += 1
+            return False
+        with self._lock:
+            self._entries[key] = {"value": value, "fetched_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._save()
+        return True
 
-            if "data" in data and data["data"]:
-                prices.append({"stock": stock, "price": round(data["data"][0].get("close", 0), 2)})
-            else:
-                logger.error(f"Нет данных о цене для акции {stock}. Ответ API: {data}")
+    def _load(self) -> None:
+        """Загружает записи кэша с диска."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for item in json.load(f):
+                    self._entries[tuple(item["key"][:2]) + (tuple(item["key"][2]),)] = {
+                        "value": item["value"],
+                        "fetched_at": item["fetched_at"],
+                    }
+        except Exception as e:
+            logger.error(f"Ошибка загрузки кэша рыночных данных: {e}")
+            self._entries.clear()
 
+    def _save(self) -> None:
+        """Атомарно сохраняет записи кэша на диск."""
+        if not self.path:
+            return
+        with self._lock:
+            items = [
+                {"key": [key[0], key[1], list(key[2])], "value": entry["value"], "fetched_at": entry["fetched_at"]}
+                for key, entry in self._entries.items()
+            ]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
         except Exception as e:
-            logger.error(f"Ошибка получения цены акции {stock}: {e}")
+            logger.error(f"Ошибка сохранения кэша рыночных данных: {e}")
+
 
-    return prices
+def get_market_cache() -> MarketDataCache:
+    """Возвращает общий кэш рыночных данных, создавая его при первом обращении."""
+    global _market_cache
+    with _market_cache_lock:
+        if _market_cache is None:
+            _market_cache = MarketDataCache()
+        return _market_cache
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.aggregates import HomePageAggregates
+from src.utils import normalize_transactions, restore_state
+from src.views import get_card_summary, get_top_transactions
+
+
+@pytest.fixture
+def sample_df():
+    """Тестовый DataFrame с транзакциями по нескольким картам."""
+    return normalize_transactions(
+        pd.DataFrame(
+            {
+                "Дата операции": [f"{day:02d}.12.2021 12:00:00" for day in range(1, 9)],
+                "Номер карты": ["*7197", "*7197", "*5091", "*5091", "*4556", "*7197", "*4556", "*5091"],
+                "Сумма операции": [-100.5, 500.0, -2000.0, 300.0, -10.0, 500.0, 1000.0, -40.25],
+                "Категория": ["Супермаркеты", "Пополнения", "Переводы", "Пополнения"] * 2,
+                "Описание": ["Колхоз", "Пополнение", "Иван И.", "Пополнение", "Магнит", "Бонус", "Зарплата", "Аптека"],
+            }
+        )
+    )
+
+
+def test_incremental_update_matches_full_recompute(sample_df):
+    """Агрегаты, обновляемые по частям, совпадают с расчетом по всему DataFrame."""
+    aggregates = HomePageAggregates(top_k=3)
+    for start in range(0, len(sample_df), 3):
+        aggregates.update(sample_df.iloc[start : start + 3])
+
+    assert aggregates.card_summary() == get_card_summary(sample_df)
+    assert aggregates.top_transactions() == get_top_transactions(sample_df)[:3]
+    assert aggregates.rows == len(sample_df)
+
+
+def test_save_and_load(sample_df, tmp_path):
+    """Агрегаты сохраняются между запусками и продолжают обновляться."""
+    path = str(tmp_path / "aggregates.json")
+    HomePageAggregates.from_frame(sample_df.iloc[:4]).save(path)
+
+    aggregates = HomePageAggregates.load(path)
+    aggregates.update(sample_df.iloc[4:])
+    assert aggregates.card_summary() == get_card_summary(sample_df)
+    assert aggregates.top_transactions() == get_top_transactions(sample_df)
+
+
+def test_load_missing_or_corrupt(tmp_path):
+    """Отсутствующий или поврежденный файл не загружается."""
+    assert HomePageAggregates.load(str(tmp_path / "missing.json")) is None
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    assert HomePageAggregates.load(str(tmp_path / "broken.json")) is None
+
+
+def test_restore_state_updates_with_appended_rows(sample_df, tmp_path):
+    """Сохраненные агрегаты дополняются только строками, добавленными в конец."""
+    path = str(tmp_path / "aggregates.json")
+    restore_state(HomePageAggregates, sample_df.iloc[:5], path)
+
+    with patch.object(HomePageAggregates, "from_frame", side_effect=AssertionError("Агрегаты построены заново")):
+        aggregates = restore_state(HomePageAggregates, sample_df, path)
+    assert aggregates.rows == len(sample_df)
+    assert aggregates.card_summary() == get_card_summary(sample_df)
+    assert HomePageAggregates.load(path).rows == len(sample_df)
+
+
+def test_restore_state_rebuilds_changed_rows(sample_df, tmp_path):
+    """Если сохраненные строки изменились, агрегаты строятся заново."""
+    path = str(tmp_path / "aggregates.json")
+    restore_state(HomePageAggregates, sample_df, path)
+    changed = sample_df.assign(**{"Сумма операции": sample_df["Сумма операции"] * 2})
+
+    aggregates = restore_state(HomePageAggregates, changed, path)
+    assert aggregates.card_summary() == get_card_summary(changed)
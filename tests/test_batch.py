@@ -0,0 +1,99 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.batch import analyze_files, find_workbooks
+from src.fx import FxRateTable
+from src.reports import spending_report_all_categories
+from src.utils import normalize_transactions
+from src.views import get_card_summary, get_top_transactions
+
+
+@pytest.fixture
+def exports(tmp_path):
+    """Создает две выгрузки по разным счетам и возвращает их общий DataFrame."""
+    first = pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 16:44:00", "30.12.2021 12:00:00", "29.12.2021 10:00:00"],
+            "Номер карты": ["*7197", "*7197", "*5091"],
+            "Сумма операции": [-100.5, 5000.0, -300.0],
+            "Категория": ["Супермаркеты", "Пополнения", "Переводы"],
+            "Описание": ["Колхоз", "Пополнение", "Иван И."],
+        }
+    )
+    second = pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 10:00:00", "28.12.2021 09:00:00"],
+            "Номер карты": ["*4556", "*7197"],
+            "Сумма операции": [7000.0, -50.0],
+            "Категория": ["Пополнения", "Супермаркеты"],
+            "Описание": ["Зарплата", "Магнит"],
+        }
+    )
+    first.to_excel(tmp_path / "account1.xlsx", index=False)
+    second.to_excel(tmp_path / "account2.xlsx", index=False)
+    (tmp_path / "broken.xlsx").write_text("not a workbook")
+    return normalize_transactions(pd.concat([first, second], ignore_index=True))
+
+
+def test_find_workbooks(tmp_path, exports):
+    """Файлы находятся по каталогу и по шаблону."""
+    assert [path.split("/")[-1] for path in find_workbooks(str(tmp_path))] == [
+        "account1.xlsx",
+        "account2.xlsx",
+        "broken.xlsx",
+    ]
+    assert len(find_workbooks(str(tmp_path / "account*.xlsx"))) == 2
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_analyze_files_merges_results(tmp_path, exports, max_workers):
+    """Объединенный результат совпадает с анализом общего DataFrame."""
+    result = analyze_files(str(tmp_path), "31.12.2021", max_workers=max_workers)
+
+    assert len(result["files"]) == 2
+    assert [error["file"].split("/")[-1] for error in result["errors"]] == ["broken.xlsx"]
+    assert result["rows"] == 5
+    assert result["cards"] == get_card_summary(exports)
+    assert result["top_transactions"] == get_top_transactions(exports)
+    assert [transfer["Описание"] for transfer in result["p2p_transfers"]] == ["Иван И."]
+    _, totals = spending_report_all_categories(exports, "31.12.2021", max_workers=0)
+    assert result["category_totals"] == totals.round(2).to_dict()
+
+
+def test_analyze_files_no_files(tmp_path):
+    """Пустой результат, если файлы не найдены."""
+    result = analyze_files(str(tmp_path / "*.xlsx"))
+    assert result["files"] == [] and result["rows"] == 0
+
+
+class RecordingRateTable(FxRateTable):
+    """Таблица курсов, которая вместо запроса к API запоминает запрошенные даты."""
+
+    def fetch(self, pairs, timeout=None):
+        self.requested = getattr(self, "requested", []) + [sorted(pairs["date"])]
+        self.rates = {"USD": {"2021-12-10": 80.0, "2021-12-11": 90.0}}
+        return len(pairs)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_analyze_files_fetches_rates_once(tmp_path, max_workers):
+    """Недостающие курсы всех файлов запрашиваются одним вызовом в основном процессе."""
+    for number, day in enumerate(["10", "11"]):
+        pd.DataFrame(
+            {
+                "Дата операции": [f"{day}.12.2021 12:00:00"],
+                "Номер карты": ["*7197"],
+                "Сумма операции": [-2.0],
+                "Валюта операции": ["USD"],
+                "Категория": ["Супермаркеты"],
+                "Описание": ["Магазин"],
+            }
+        ).to_excel(tmp_path / f"account{number}.xlsx", index=False)
+    table = RecordingRateTable(path=None)
+    with patch("src.batch.get_fx_table", return_value=table):
+        result = analyze_files(str(tmp_path), "31.12.2021", max_workers=max_workers)
+
+    assert table.requested == [["2021-12-10", "2021-12-11"]]
+    assert result["cards"] == [{"last_digits": "7197", "total_spent": 340.0, "cashback": 3}]
@@ -0,0 +1,73 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.cache import cached_file_reader, invalidate_cache, prune_cache
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Создает тестовый EXCEL-файл с транзакциями."""
+    file_path = tmp_path / "operations.xlsx"
+    pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 16:44:00", "30.12.2021 16:44:00"],
+            "Категория": ["Супермаркеты", "Развлечения"],
+            "Сумма операции": [-100.0, -50.0],
+        }
+    ).to_excel(file_path, index=False)
+    return file_path
+
+
+def test_cached_file_reader_uses_cache(workbook, tmp_path):
+    """Повторное чтение не обращается к EXCEL-файлу."""
+    cache_dir = tmp_path / "cache"
+    first = cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 2
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("src.cache.file_reader", lambda *args: pytest.fail("Чтение xlsx вместо кэша"))
+        second = cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_cached_file_reader_stale(workbook, tmp_path):
+    """Измененный файл перечитывается."""
+    cache_dir = tmp_path / "cache"
+    cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+    pd.DataFrame({"Категория": ["Переводы"] * 3}).to_excel(workbook, index=False)
+
+    result = cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+    assert list(result["Категория"]) == ["Переводы"] * 3
+
+
+def test_cached_file_reader_corrupt(workbook, tmp_path):
+    """Поврежденная запись кэша заменяется данными из xlsx."""
+    cache_dir = tmp_path / "cache"
+    cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+    for entry in os.listdir(cache_dir):
+        if entry.endswith(".pkl"):
+            (cache_dir / entry).write_bytes(b"corrupt")
+
+    result = cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+    assert len(result) == 2
+
+
+def test_invalidate_and_prune_cache(workbook, tmp_path):
+    """Проверяет явную инвалидацию и ограничение размера кэша."""
+    cache_dir = tmp_path / "cache"
+    cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+    assert invalidate_cache(str(workbook), cache_dir=str(cache_dir)) == 1
+    assert os.listdir(cache_dir) == []
+
+    cached_file_reader(str(workbook), cache_dir=str(cache_dir))
+    prune_cache(str(cache_dir), max_bytes=0)
+    assert os.listdir(cache_dir) == []
+
+
+def test_cached_file_reader_missing_file(tmp_path):
+    """Несуществующий файл возвращает пустой DataFrame."""
+    result = cached_file_reader(str(tmp_path / "missing.xlsx"), cache_dir=str(tmp_path / "cache"))
+    assert result.empty
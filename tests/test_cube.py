@@ -0,0 +1,116 @@
+import pandas as pd
+import pytest
+
+from src.cube import SpendingCube
+from src.reports import spending_by_category
+from src.utils import normalize_transactions, restore_state
+
+
+@pytest.fixture
+def sample_df():
+    """Тестовый DataFrame с транзакциями за три месяца по двум картам."""
+    return normalize_transactions(
+        pd.DataFrame(
+            {
+                "Дата операции": [
+                    "05.10.2021 12:00:00",
+                    "20.10.2021 12:00:00",
+                    "03.11.2021 12:00:00",
+                    "15.11.2021 12:00:00",
+                    "01.12.2021 12:00:00",
+                    "10.12.2021 12:00:00",
+                    "12.12.2021 12:00:00",
+                ],
+                "Номер карты": ["*7197", "*5091", "*7197", "*7197", "*5091", "*7197", None],
+                "Сумма операции": [-100.0, -200.0, -50.0, 1000.0, -300.0, -25.5, -10.0],
+                "Кэшбэк": [1.0, None, None, None, 3.0, None, None],
+                "Категория": [
+                    "Супермаркеты",
+                    "Фастфуд",
+                    "Супермаркеты",
+                    "Пополнения",
+                    "Супермаркеты",
+                    "Фастфуд",
+                    "Супермаркеты",
+                ],
+                "Описание": ["Колхоз", "KFC", "Магнит", "Пополнение", "SPAR", "KFC", "Магнит"],
+            }
+        )
+    )
+
+
+def test_query_matches_raw_transactions(sample_df):
+    """Траты по категории из куба совпадают с расчетом по транзакциям."""
+    cube = SpendingCube.from_frame(sample_df)
+    result = cube.query("01.10.2021", "31.12.2021", category="Супермаркеты", by=())
+    raw = spending_by_category.__wrapped__(sample_df, "Супермаркеты", "31.12.2021")
+
+    assert result["spent"].iloc[0] == -raw["Сумма операции"].sum()
+    assert result["count"].iloc[0] == len(raw)
+    assert result["cashback"].iloc[0] == 4.0
+
+
+def test_query_slices(sample_df):
+    """Срезы по картам, категориям и окну месяцев."""
+    cube = SpendingCube.from_frame(sample_df)
+
+    by_card = cube.query(by=("card",)).set_index("card")["spent"].to_dict()
+    assert by_card == {"": 10.0, "5091": 500.0, "7197": 175.5}
+
+    november = cube.query("01.11.2021", "30.11.2021", by=("category", "card"))
+    assert november.to_dict(orient="records") == [
+        {"category": "Супермаркеты", "card": "7197", "spent": 50.0, "count": 1, "cashback": 0.0}
+    ]
+    assert cube.query(card=["7197", "5091"], category="Фастфуд", by=())["spent"].iloc[0] == 225.5
+
+
+def test_month_over_month_and_year_to_date(sample_df):
+    """Изменение трат по месяцам и траты с начала года."""
+    cube = SpendingCube.from_frame(sample_df)
+
+    months = cube.month_over_month()
+    assert months["month"].tolist() == ["2021-10", "2021-11", "2021-12"]
+    assert months["spent"].tolist() == [300.0, 50.0, 335.5]
+    assert months["change"].iloc[1] == -83.33
+
+    ytd = cube.year_to_date("15.11.2021", by=("category",))
+    assert ytd.set_index("category")["spent"].to_dict() == {"Супермаркеты": 150.0, "Фастфуд": 200.0}
+
+
+def test_incremental_update_and_persistence(sample_df, tmp_path):
+    """Куб, пополняемый по частям и сохраненный между запусками, совпадает с построенным целиком."""
+    path = str(tmp_path / "cube.json")
+    SpendingCube.from_frame(sample_df.iloc[:3]).save(path)
+
+    cube = SpendingCube.load(path)
+    cube.update(sample_df.iloc[3:])
+    full = SpendingCube.from_frame(sample_df)
+
+    assert cube.rows == len(sample_df)
+    by = ("month", "category", "card")
+    pd.testing.assert_frame_equal(cube.query(by=by), full.query(by=by))
+
+
+def test_restore_state_updates_saved_cube(sample_df, tmp_path):
+    """Сохраненный куб дополняется строками, добавленными в конец."""
+    path = str(tmp_path / "cube.json")
+    restore_state(SpendingCube, sample_df.iloc[:4], path)
+    cube = restore_state(SpendingCube, sample_df, path)
+
+    assert SpendingCube.load(path).rows == cube.rows == len(sample_df)
+    assert cube.query(by=("month",)).equals(SpendingCube.from_frame(sample_df).query(by=("month",)))
+
+
+def test_restore_state_rebuilds_changed_categories(sample_df, tmp_path):
+    """Если изменились только категории, куб строится заново."""
+    path = str(tmp_path / "cube.json")
+    restore_state(SpendingCube, sample_df, path)
+    changed = sample_df.assign(Категория="Фастфуд")
+
+    cube = restore_state(SpendingCube, changed, path)
+    assert cube.query(by=("category",))["category"].tolist() == ["Фастфуд"]
+
+
+def test_load_missing_file(tmp_path):
+    """Отсутствующий файл куба."""
+    assert SpendingCube.load(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from src.fx import UNAVAILABLE_RECHECK_DAYS, FxRateTable, convert_currency
+from src.utils import normalize_transactions
+from src.views import get_card_summary
+
+
+class TimeseriesHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик локального HTTP-сервера, имитирующего timeseries API Layer (1 RUB = 0.0125 USD).
+    При fail=True отвечает телом с ошибкой, как API при исчерпанном лимите.
+    """
+
+    requests_log: list = []
+    fail = False
+
+    def do_GET(self):
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        TimeseriesHandler.requests_log.append(query)
+        days = pd.date_range(query["start_date"], query["end_date"]).strftime("%Y-%m-%d")
+        rates = {"USD": 0.0125, "EUR": 0.01}
+        if TimeseriesHandler.fail:
+            body = {"success": False, "error": {"code": 104, "type": "usage_limit_reached"}}
+        else:
+            symbols = [s for s in query["symbols"].split(",") if s in rates]
+            body = {"success": True, "rates": {day: {s: rates[s] for s in symbols} for day in days}}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fx_server():
+    """Запускает локальный HTTP-сервер курсов."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TimeseriesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    TimeseriesHandler.requests_log = []
+    TimeseriesHandler.fail = False
+    with patch("src.fx.FIXER_TIMESERIES_URL", f"http://127.0.0.1:{server.server_address[1]}/fixer/timeseries"):
+        yield TimeseriesHandler.requests_log
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sample_df():
+    """Тестовый DataFrame с операциями в разных валютах."""
+    return normalize_transactions(
+        pd.DataFrame(
+            {
+                "Дата операции": ["10.12.2021 12:00:00", "05.12.2021 12:00:00", "01.03.2020 12:00:00"] * 2,
+                "Номер карты": ["*7197"] * 3 + ["*5091"] * 3,
+                "Сумма операции": [-100.0, -10.0, -20.0, -50.0, -2.0, 5.0],
+                "Валюта операции": ["RUB", "USD", "EUR", "RUB", "USD", "USD"],
+                "Сумма платежа": [-100.0, -10.0, -20.0, -50.0, -2.0, 370.0],
+                "Валюта платежа": ["RUB", "USD", "EUR", "RUB", "USD", "RUB"],
+                "Категория": ["Супермаркеты"] * 6,
+            }
+        )
+    )
+
+
+def test_convert_currency_fetches_rates_in_bulk(sample_df, fx_server, tmp_path):
+    """Курсы запрашиваются пакетно по периодам не длиннее года и кэшируются в файле."""
+    path = str(tmp_path / "fx.json")
+    result = convert_currency(sample_df, FxRateTable(path=path))
+
+    assert result["Сумма операции"].tolist() == [-100.0, -800.0, -2000.0, -50.0, -160.0, 370.0]
+    assert set(result["Валюта операции"]) == {"RUB"}
+    assert sample_df["Сумма операции"].tolist() == [-100.0, -10.0, -20.0, -50.0, -2.0, 5.0]
+    assert [(query["start_date"], query["end_date"], query["symbols"]) for query in fx_server] == [
+        ("2020-03-01", "2020-03-01", "EUR"),
+        ("2021-12-05", "2021-12-05", "USD"),
+    ]
+    assert get_card_summary(result) == [
+        {"last_digits": "5091", "total_spent": 210.0, "cashback": 2},
+        {"last_digits": "7197", "total_spent": 2900.0, "cashback": 29},
+    ]
+
+    fx_server.clear()
+    assert convert_currency(sample_df, FxRateTable(path=path))["Сумма операции"].equals(result["Сумма операции"])
+    assert fx_server == []
+
+
+def test_unavailable_rates_are_not_requested_again(fx_server, tmp_path):
+    """Пары, которых нет в ответе API, сохраняются и при следующем запуске не запрашиваются."""
+    path = str(tmp_path / "fx.json")
+    df = normalize_transactions(
+        pd.DataFrame(
+            {
+                "Дата операции": ["10.12.2021 12:00:00", "10.12.2021 13:00:00"],
+                "Сумма операции": [-10.0, -5.0],
+                "Валюта операции": ["USD", "XYZ"],
+                "Категория": ["Супермаркеты"] * 2,
+            }
+        )
+    )
+    result = convert_currency(df, FxRateTable(path=path))
+    assert result["Сумма операции"].tolist() == [-800.0, -5.0]
+    assert result["Валюта операции"].tolist() == ["RUB", "XYZ"]
+    assert len(fx_server) == 1
+
+    table = FxRateTable(path=path)
+    assert list(table.unavailable) == ["XYZ"] and list(table.unavailable["XYZ"]) == ["2021-12-10"]
+    assert convert_currency(df, table)["Сумма операции"].tolist() == [-800.0, -5.0]
+    assert len(fx_server) == 1
+
+
+def test_error_response_is_not_cached(sample_df, fx_server, tmp_path):
+    """Ответ API с ошибкой не помечает пары недоступными, при следующем запуске они запрашиваются снова."""
+    path = str(tmp_path / "fx.json")
+    TimeseriesHandler.fail = True
+    result = convert_currency(sample_df, FxRateTable(path=path))
+    assert result["Сумма операции"].tolist() == sample_df["Сумма операции"].tolist()[:5] + [370.0]
+
+    table = FxRateTable(path=path)
+    assert table.unavailable == {}
+    TimeseriesHandler.fail = False
+    assert convert_currency(sample_df, table)["Сумма операции"].tolist()[:3] == [-100.0, -800.0, -2000.0]
+
+
+def test_unavailable_rates_expire(tmp_path):
+    """Недоступные пары повторно запрашиваются после UNAVAILABLE_RECHECK_DAYS дней."""
+    table = FxRateTable(path=None)
+    dates, currencies = pd.Series(pd.to_datetime(["2021-12-10"])), pd.Series(["XYZ"])
+    table.unavailable = {"XYZ": {"2021-12-10": time.time()}}
+    assert table.missing(dates, currencies).empty
+    table.unavailable = {"XYZ": {"2021-12-10": time.time() - (UNAVAILABLE_RECHECK_DAYS + 1) * 24 * 3600}}
+    assert table.missing(dates, currencies).to_dict(orient="records") == [{"date": "2021-12-10", "currency": "XYZ"}]
+
+    path = tmp_path / "fx.json"
+    path.write_text(json.dumps({"base": "RUB", "rates": {}, "unavailable": {"XYZ": ["2021-12-10"]}}), encoding="utf-8")
+    assert len(FxRateTable(path=str(path)).missing(dates, currencies)) == 1
+
+
+def test_convert_currency_without_rates(sample_df, tmp_path):
+    """Без курсов суммы в других валютах остаются без изменений."""
+    result = convert_currency(sample_df, FxRateTable(path=None), fetch=False)
+    assert result["Сумма операции"].tolist() == [-100.0, -10.0, -20.0, -50.0, -2.0, 370.0]
+    assert result["Валюта операции"].tolist() == ["RUB", "USD", "EUR", "RUB", "USD", "RUB"]
+
+
+def test_lookup_uses_nearest_known_rate():
+    """Курс на день без котировки берется с ближайшего известного дня."""
+    table = FxRateTable(path=None)
+    table.rates = {"USD": {"2021-12-03": 75.0, "2021-12-20": 80.0}}
+    rates = table.lookup(
+        pd.Series(pd.to_datetime(["2021-12-05 10:00", "2021-12-19 10:00", "2022-02-01 00:00", "2021-12-05 00:00"])),
+        pd.Series(["USD", "USD", "USD", "RUB"]),
+    )
+    assert rates[:2].tolist() == [75.0, 80.0]
+    assert pd.isna(rates[2])
+    assert rates[3] == 1.0
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from src.index import TransactionIndex
+from src.reports import spending_by_category
+from src.utils import normalize_transactions
+
+
+@pytest.fixture
+def sample_df():
+    """Тестовый DataFrame с транзакциями в произвольном порядке дат."""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "31.12.2021 16:44:00",
+                "01.10.2021 10:00:00",
+                "15.11.2021 12:00:00",
+                "01.01.2022 09:00:00",
+                "31.12.2021 23:59:59",
+                "20.12.2021 08:00:00",
+            ],
+            "Категория": [
+                "Супермаркеты",
+                "Супермаркеты",
+                "Супермаркеты",
+                "Супермаркеты",
+                "Развлечения",
+                "Супермаркеты",
+            ],
+            "Сумма операции": ["-100,00", "-200,00", "-50,00", "-70,00", "-10,00", "30,00"],
+        }
+    )
+
+
+def test_index_matches_full_scan(sample_df):
+    """Результат индекса совпадает с полным просмотром DataFrame."""
+    index = TransactionIndex(sample_df)
+    queries = [("Супермаркеты", "31.12.2021"), ("Развлечения", "31.12.2021"), ("Супермаркеты", "01.12.2021")]
+    for category, date in queries:
+        expected = spending_by_category.__wrapped__(normalize_transactions(sample_df), category, date)
+        pd.testing.assert_frame_equal(index.spending_by_category(category, date), expected)
+
+
+def test_index_unknown_category(sample_df):
+    """Неизвестная категория возвращает пустой результат."""
+    assert TransactionIndex(sample_df).spending_by_category("Транспорт", "31.12.2021").empty
+
+
+def test_index_batch(sample_df):
+    """Пакетный запрос возвращает результаты в порядке запросов."""
+    index = TransactionIndex(sample_df)
+    results = index.spending_batch([("Супермаркеты", "31.12.2021"), ("Развлечения", "31.12.2021")])
+    assert [len(result) for result in results] == [2, 1]
+    assert sorted(index.categories) == ["Развлечения", "Супермаркеты"]
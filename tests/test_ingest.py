@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.aggregates import HomePageAggregates
+from src.cube import SpendingCube
+from src.fx import FxRateTable
+from src.ingest import ingest_statement, load_watermark
+from src.stream import iter_batches
+from src.utils import file_reader, normalize_transactions
+from src.views import get_card_summary
+
+
+def make_export(path, days: list) -> str:
+    """Сохраняет выгрузку с операциями за указанные дни декабря (от новых к старым)."""
+    days = sorted(days, reverse=True)
+    pd.DataFrame(
+        {
+            "Дата операции": [f"{day:02d}.12.2021 12:00:00" for day in days],
+            "Номер карты": ["*7197"] * len(days),
+            "Статус": ["OK"] * len(days),
+            "Сумма операции": [-float(day) for day in days],
+            "Валюта операции": ["RUB"] * len(days),
+            "Категория": ["Супермаркеты"] * len(days),
+            "Описание": [f"Покупка {day}" for day in days],
+        }
+    ).to_excel(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    """Каталог хранилища для теста."""
+    return str(tmp_path / "store")
+
+
+def test_ingest_overlapping_exports(tmp_path, store_dir):
+    """Перекрывающиеся выгрузки добавляют в хранилище только новые строки."""
+    first = ingest_statement(make_export(tmp_path / "day1.xlsx", [1, 2, 3, 4]), store_dir, batch_size=2)
+    second = ingest_statement(make_export(tmp_path / "day2.xlsx", [3, 4, 5, 6]), store_dir, batch_size=2)
+    third = ingest_statement(make_export(tmp_path / "day3.xlsx", [5, 6]), store_dir, batch_size=2)
+
+    assert len(first) == 4
+    assert sorted(second["Описание"]) == ["Покупка 5", "Покупка 6"]
+    assert third.empty
+
+    stored = file_reader(store_dir)
+    assert sorted(stored["Описание"]) == [f"Покупка {day}" for day in range(1, 7)]
+    assert load_watermark(store_dir)["timestamp"] == pd.Timestamp("2021-12-06 12:00:00")
+
+
+def test_ingest_same_timestamp_deduplication(tmp_path, store_dir):
+    """Строки со временем водяного знака сверяются по отпечаткам."""
+    ingest_statement(make_export(tmp_path / "day1.xlsx", [1, 2]), store_dir)
+    export = pd.read_excel(make_export(tmp_path / "day2.xlsx", [1, 2]))
+    extra = export.iloc[[0]].assign(Описание="Другая покупка")
+    pd.concat([extra, export]).to_excel(tmp_path / "day2.xlsx", index=False)
+
+    new_rows = ingest_statement(str(tmp_path / "day2.xlsx"), store_dir)
+    assert list(new_rows["Описание"]) == ["Другая покупка"]
+
+
+def test_ingest_stops_reading_past_watermark(tmp_path, store_dir, monkeypatch):
+    """Чтение выгрузки прекращается после пакета старше водяного знака."""
+    ingest_statement(make_export(tmp_path / "day1.xlsx", list(range(1, 11))), store_dir)
+    path = make_export(tmp_path / "day2.xlsx", list(range(1, 13)))
+
+    read_batches = []
+
+    def counting_batches(*args, **kwargs):
+        for batch in iter_batches(*args, **kwargs):
+            read_batches.append(len(batch))
+            yield batch
+
+    monkeypatch.setattr("src.ingest.iter_batches", counting_batches)
+    ingest_statement(path, store_dir, batch_size=2)
+    assert len(read_batches) == 3
+
+
+def test_ingest_updates_aggregates(tmp_path, store_dir):
+    """Агрегаты главной страницы обновляются только новыми строками."""
+    aggregates = HomePageAggregates()
+    ingest_statement(make_export(tmp_path / "day1.xlsx", [1, 2]), store_dir, aggregates=aggregates)
+    ingest_statement(make_export(tmp_path / "day2.xlsx", [2, 3]), store_dir, aggregates=aggregates)
+
+    assert aggregates.rows == 3
+    assert aggregates.card_summary() == get_card_summary(normalize_transactions(file_reader(store_dir)))
+
+
+def test_ingest_updates_cube(tmp_path, store_dir):
+    """Куб трат обновляется только новыми строками."""
+    cube = SpendingCube()
+    ingest_statement(make_export(tmp_path / "day1.xlsx", [1, 2]), store_dir, cube=cube)
+    ingest_statement(make_export(tmp_path / "day2.xlsx", [2, 3]), store_dir, cube=cube)
+
+    assert cube.rows == 3
+    assert cube.query(by=()).to_dict(orient="records") == [{"spent": 6.0, "count": 3, "cashback": 0.0}]
+
+
+def test_ingest_converts_currency(tmp_path, store_dir):
+    """Суммы в валюте пересчитываются в рубли в хранилище, агрегатах и кубе, повторов не появляется."""
+    path = make_export(tmp_path / "day1.xlsx", [1, 2])
+    export = pd.read_excel(path)
+    export.loc[0, ["Сумма операции", "Валюта операции"]] = [-2.0, "USD"]
+    export.to_excel(path, index=False)
+    table = FxRateTable(path=None)
+    table.rates = {"USD": {"2021-12-02": 80.0}}
+    cube = SpendingCube()
+
+    with patch("src.fx.get_fx_table", return_value=table):
+        ingest_statement(path, store_dir, cube=cube)
+        assert ingest_statement(path, store_dir, cube=cube).empty
+
+    stored = file_reader(store_dir)
+    assert sorted(stored["Сумма операции"]) == [-160.0, -1.0]
+    assert set(stored["Валюта операции"]) == {"RUB"}
+    assert cube.query(by=()).to_dict(orient="records") == [{"spent": 161.0, "count": 2, "cashback": 0.0}]
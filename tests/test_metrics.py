@@ -0,0 +1,106 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.reports import write_report
+from src.services import find_p2p_transfers
+from src.utils import file_reader
+
+
+@pytest.fixture
+def enabled_metrics():
+    """Включает сбор метрик на время теста."""
+    metrics.reset_metrics()
+    metrics.enable_metrics()
+    yield
+    metrics.enable_metrics(False)
+    metrics.reset_metrics()
+
+
+def test_timed_records_duration_and_rows(enabled_metrics):
+    """Тестирование замера функции и количества строк результата."""
+
+    @metrics.timed("load")
+    def load():
+        return [1, 2, 3]
+
+    load()
+    load()
+    summary = metrics.metrics_summary()["load"]
+    assert summary["count"] == 2
+    assert summary["rows_total"] == 6
+    assert summary["errors"] == 0
+
+
+def test_timed_records_errors(enabled_metrics):
+    """Тестирование учета исключений."""
+
+    @metrics.timed()
+    def broken():
+        raise ValueError("ошибка")
+
+    with pytest.raises(ValueError):
+        broken()
+    assert metrics.metrics_summary()["broken"]["errors"] == 1
+
+
+def test_disabled_metrics_are_not_recorded():
+    """Тестирование того, что при выключенном сборе метрики не накапливаются."""
+    metrics.reset_metrics()
+
+    @metrics.timed("disabled")
+    def func():
+        return 1
+
+    assert func() == 1
+    with metrics.span("disabled_span") as measure:
+        measure.rows = 10
+    assert metrics.metrics_summary() == {}
+
+
+def test_instrumented_functions(enabled_metrics, tmp_path):
+    """Тестирование замеров чтения файла и сохранения отчета."""
+    df = pd.DataFrame({"Сумма операции": [-100.0, -50.0]})
+    path = tmp_path / "report.json"
+    write_report(df, str(path))
+    file_reader(str(tmp_path / "missing.xlsx"))
+
+    summary = metrics.metrics_summary()
+    assert summary["save_report"]["rows_total"] == 2
+    assert summary["save_report"]["bytes_total"] == path.stat().st_size
+    assert summary["file_reader"]["count"] == 1
+
+
+def test_p2p_transfers_records_rows(enabled_metrics):
+    """Поиск P2P переводов учитывает количество найденных переводов, как и остальные анализы."""
+    df = pd.DataFrame(
+        {
+            "Категория": ["Переводы", "Переводы", "Супермаркеты"],
+            "Описание": ["Иван С.", "Перевод на карту", "Магнит"],
+            "Сумма операции": [-100.0, -200.0, -50.0],
+        }
+    )
+    find_p2p_transfers(df)
+
+    summary = metrics.metrics_summary()["find_p2p_transfers"]
+    assert summary["count"] == 1
+    assert summary["rows_total"] == 1
+
+
+def test_export_metrics(enabled_metrics, tmp_path):
+    """Тестирование экспорта в формате Prometheus и JSON."""
+    metrics.record("stage", 0.02, rows=5)
+    prom_path = tmp_path / "metrics.prom"
+    json_path = tmp_path / "metrics.json"
+
+    assert metrics.export_metrics(str(prom_path))
+    assert metrics.export_metrics(str(json_path), "json")
+
+    text = prom_path.read_text(encoding="utf-8")
+    assert 'app_duration_seconds_bucket{span="stage",le="0.01"} 0' in text
+    assert 'app_duration_seconds_bucket{span="stage",le="0.05"} 1' in text
+    assert 'app_duration_seconds_count{span="stage"} 1' in text
+    assert 'app_rows_total{span="stage"} 5' in text
+    assert json.loads(json_path.read_text(encoding="utf-8"))["stage"]["count"] == 1
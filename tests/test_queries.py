@@ -0,0 +1,112 @@
+import io
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.queries import Dataset, execute_query, run_queries
+from src.reports import spending_by_category
+
+
+@pytest.fixture
+def dataset():
+    """Набор тестовых транзакций."""
+    return Dataset(
+        pd.DataFrame(
+            {
+                "Дата операции": ["31.12.2021 16:44:00", "30.12.2021 12:00:00", "29.12.2021 10:00:00"],
+                "Номер карты": ["*7197", "*7197", "*5091"],
+                "Сумма операции": [-100.5, 5000.0, -300.0],
+                "Категория": ["Супермаркеты", "Пополнения", "Переводы"],
+                "Описание": ["Колхоз", "Пополнение", "Иван И."],
+            }
+        )
+    )
+
+
+def test_execute_query_types(dataset):
+    """Запросы всех типов выполняются на загруженном наборе данных."""
+    with patch("src.views.load_user_settings", return_value={"user_currencies": [], "user_stocks": []}):
+        home = execute_query(dataset, {"id": 1, "type": "home_page"})
+    assert home["status"] == "ok" and len(home["result"]["cards"]) == 2
+
+    p2p = execute_query(dataset, {"id": 2, "type": "p2p_transfers"})
+    assert [transfer["Описание"] for transfer in p2p["result"]] == ["Иван И."]
+
+    query = {"id": 3, "type": "category_report", "category": "Супермаркеты", "date": "31.12.2021"}
+    report = execute_query(dataset, query)
+    expected = spending_by_category.__wrapped__(dataset.df, "Супермаркеты", "31.12.2021")
+    assert [row["Описание"] for row in report["result"]] == list(expected["Описание"])
+    assert report["result"][0]["Дата операции"] == "31.12.2021 16:44:00"
+    assert report["elapsed_ms"] >= 0
+
+
+def test_cube_report(dataset):
+    """Запрос cube_report отвечает из куба трат."""
+    query = {"id": 1, "type": "cube_report", "by": "card,category", "end_date": "31.12.2021"}
+    response = execute_query(dataset, query)
+    assert response["result"] == [
+        {"card": "5091", "category": "Переводы", "spent": 300.0, "count": 1, "cashback": 0.0},
+        {"card": "7197", "category": "Супермаркеты", "spent": 100.5, "count": 1, "cashback": 0.0},
+    ]
+    assert execute_query(dataset, {"id": 2, "type": "cube_report", "by": "day"})["status"] == "error"
+
+
+def test_search(dataset):
+    """Запрос search отвечает по индексу описаний с фильтрами."""
+    response = execute_query(dataset, {"id": 1, "type": "search", "query": "колх", "category": "Супермаркеты"})
+    assert [row["Описание"] for row in response["result"]] == ["Колхоз"]
+    assert execute_query(dataset, {"id": 2, "type": "search", "query": "колх", "mode": "regex"})["status"] == "error"
+
+
+def test_execute_query_errors(dataset):
+    """Некорректные запросы возвращают ответ с ошибкой."""
+    assert execute_query(dataset, {"id": 1, "type": "unknown"})["status"] == "error"
+    assert execute_query(dataset, {"id": 2, "type": "category_report"})["status"] == "error"
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_run_queries(dataset, max_workers):
+    """Ответы пишутся в JSONL в порядке запросов."""
+    source = io.StringIO(
+        "\n".join(
+            [
+                json.dumps({"id": "a", "type": "p2p_transfers"}),
+                "",
+                json.dumps({"id": "b", "type": "category_report", "category": "Переводы", "date": "31.12.2021"}),
+                "{not json",
+            ]
+        )
+    )
+    output = io.StringIO()
+    summary = run_queries(dataset, source, output, max_workers=max_workers)
+
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [response["id"] for response in responses] == ["a", "b", 4]
+    assert [response["status"] for response in responses] == ["ok", "ok", "error"]
+    assert summary["queries"] == 3 and summary["errors"] == 1
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_queries_streams_responses(dataset, max_workers):
+    """Ответы пишутся до окончания входного потока, а не после чтения всех запросов."""
+    output = io.StringIO()
+    written = []
+
+    def source():
+        for number in range(10):
+            written.append(len(output.getvalue().splitlines()))
+            yield json.dumps({"id": number, "type": "p2p_transfers"})
+
+    run_queries(dataset, source(), output, max_workers=max_workers)
+    assert len(output.getvalue().splitlines()) == 10
+    assert written[-1] >= 10 - 2 * max_workers
+
+
+def test_run_queries_files(dataset, tmp_path):
+    """Запросы читаются из файла, ответы пишутся в файл."""
+    source = tmp_path / "queries.jsonl"
+    source.write_text(json.dumps({"id": 1, "type": "p2p_transfers"}) + "\n", encoding="utf-8")
+    run_queries(dataset, str(source), str(tmp_path / "results.jsonl"))
+    assert json.loads((tmp_path / "results.jsonl").read_text(encoding="utf-8"))["status"] == "ok"
@@ -1,7 +1,7 @@
 import json
 import pytest
 import pandas as pd
-from src.reports import spending_by_category, save_report
+from src.reports import flush_reports, save_report, spending_by_category, spending_report_all_categories, write_report
 
 @pytest.fixture
 def sample_dataframe():
@@ -43,3 +43,62 @@ def test_save_report_decorator(tmp_path):
     with open(test_file, "r", encoding="utf-8") as file:
         data = json.load(file)
         assert data == result
+
+def test_spending_by_category_does_not_mutate(sample_dataframe, tmp_path, monkeypatch):
+    """Исходный DataFrame не изменяется при формировании отчета."""
+    monkeypatch.chdir(tmp_path)
+    original = sample_dataframe.copy()
+    spending_by_category(sample_dataframe, "Супермаркеты", "31.12.2021")
+    pd.testing.assert_frame_equal(sample_dataframe, original)
+
+def test_spending_report_all_categories(sample_dataframe, tmp_path):
+    """Тестирование отчета сразу по всем категориям с сохранением файлов."""
+    reports, totals = spending_report_all_categories(sample_dataframe, "31.12.2021", output_dir=str(tmp_path))
+
+    assert sorted(reports) == ["Супермаркеты"]
+    pd.testing.assert_frame_equal(
+        reports["Супермаркеты"], spending_by_category.__wrapped__(sample_dataframe, "Супермаркеты", "31.12.2021")
+    )
+    assert totals.to_dict() == {"Супермаркеты": -300.0}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["totals.json", "Супермаркеты.json"]
+    with open(tmp_path / "totals.json", "r", encoding="utf-8") as file:
+        assert json.load(file) == [{"Категория": "Супермаркеты", "Сумма операции": -300.0}]
+
+@pytest.mark.parametrize("fmt", ["json", "json_compact", "jsonl", "csv"])
+def test_write_report_formats(sample_dataframe, tmp_path, fmt):
+    """Тестирование записи DataFrame в разных форматах."""
+    path = tmp_path / f"report.{fmt}"
+    assert write_report(sample_dataframe, str(path), fmt)
+    if fmt == "jsonl":
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    elif fmt == "csv":
+        records = pd.read_csv(path, dtype=str).to_dict(orient="records")
+    else:
+        records = json.loads(path.read_text(encoding="utf-8"))
+    assert records == sample_dataframe.to_dict(orient="records")
+
+def test_write_report_jsonl_chunks(tmp_path, monkeypatch):
+    """Тестирование записи JSON Lines частями."""
+    monkeypatch.setattr("src.reports.JSONL_CHUNK_SIZE", 2)
+    df = pd.DataFrame({"Дата операции": pd.to_datetime(["2021-12-31 16:44:00"] * 5), "Сумма": range(5)})
+    path = tmp_path / "report.jsonl"
+    assert write_report(df, str(path), "jsonl")
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["Сумма"] for line in lines] == [0, 1, 2, 3, 4]
+    assert json.loads(lines[0])["Дата операции"] == "2021-12-31T16:44:00"
+
+def test_write_report_unknown_format(tmp_path):
+    """Тестирование неизвестного формата."""
+    assert not write_report([], str(tmp_path / "report.xml"), "xml")
+
+def test_save_report_background(sample_dataframe, tmp_path):
+    """Тестирование фоновой записи отчета."""
+    path = tmp_path / "report.jsonl"
+
+    @save_report(filename=str(path), fmt="jsonl", background=True)
+    def generate_report():
+        return sample_dataframe
+
+    assert generate_report() is sample_dataframe
+    assert flush_reports(timeout=5)
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 3
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+
+from src.search import DescriptionIndex, search_transactions
+from src.utils import restore_state
+
+
+@pytest.fixture
+def sample_df():
+    """Тестовый DataFrame с повторяющимися описаниями."""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "31.12.2021 16:44:00",
+                "30.12.2021 12:00:00",
+                "15.11.2021 10:00:00",
+                "01.10.2021 09:00:00",
+                "28.12.2021 08:00:00",
+            ],
+            "Сумма операции": [-100.0, -200.0, -300.0, -50.0, -10.0],
+            "Категория": ["Супермаркеты", "Супермаркеты", "Фастфуд", "Супермаркеты", "Переводы"],
+            "MCC": [5411.0, 5411.0, 5814.0, 5411.0, None],
+            "Описание": ["Магнит", "Перекресток Экспресс", "Магнит Кафе", "Магнит", "Иван И."],
+        }
+    )
+
+
+@pytest.fixture
+def index(sample_df):
+    """Индекс описаний по тестовому DataFrame."""
+    return DescriptionIndex.from_frame(sample_df)
+
+
+def test_search_substring(index):
+    """Поиск подстроки без учета регистра."""
+    assert list(index.search("агни")) == [0, 2, 3]
+    assert list(index.search("экспр")) == [1]
+    assert list(index.search("ан")) == [4]
+
+
+def test_search_prefix_and_terms(index):
+    """Поиск по префиксу слова и по нескольким словам."""
+    assert list(index.search("кафе", mode="prefix")) == [2]
+    assert list(index.search("маг", mode="prefix")) == [0, 2, 3]
+    assert list(index.search("магнит каф", mode="terms")) == [2]
+    assert list(index.search("магнит пятерочка", mode="terms")) == []
+
+
+def test_search_filters(index):
+    """Фильтры по категории, периоду и MCC."""
+    assert list(index.search("магнит", category="Супермаркеты")) == [0, 3]
+    assert list(index.search("магнит", start_date="01.11.2021", end_date="31.12.2021")) == [0, 2]
+    assert list(index.search("", mcc=5814)) == [2]
+
+
+def test_search_incremental_add(index, sample_df):
+    """Добавленные строки находятся вместе с ранее проиндексированными."""
+    index.add(sample_df.iloc[[0, 1]])
+    assert list(index.search("магнит", category="Супермаркеты")) == [0, 3, 5]
+    assert list(index.search("перекресток")) == [1, 6]
+    assert index.rows == 7
+
+
+def test_search_transactions_and_persistence(index, sample_df, tmp_path):
+    """Индекс сохраняется рядом с данными и возвращает строки DataFrame."""
+    path = str(tmp_path / "search_index.pkl")
+    index.save(path)
+    restored = DescriptionIndex.load(path)
+
+    result = search_transactions(sample_df, restored, "перекресток")
+    assert list(result["Описание"]) == ["Перекресток Экспресс"]
+    assert DescriptionIndex.load(str(tmp_path / "missing.pkl")) is None
+
+
+def test_search_invalid_mode(index, sample_df):
+    """Неизвестный режим поиска."""
+    with pytest.raises(ValueError):
+        index.search("магнит", mode="regex")
+    assert search_transactions(sample_df, index, "магнит", mode="regex").empty
+
+
+def test_restore_state_appends_to_saved_index(sample_df, tmp_path):
+    """Сохраненный индекс дополняется строками, добавленными в конец."""
+    path = str(tmp_path / "index.pkl")
+    restore_state(DescriptionIndex, sample_df.iloc[:2], path)
+    index = restore_state(DescriptionIndex, sample_df, path)
+
+    assert DescriptionIndex.load(path).rows == index.rows == len(sample_df)
+    assert index.search("").tolist() == DescriptionIndex.from_frame(sample_df).search("").tolist()
+
+
+def test_restore_state_rebuilds_changed_descriptions(sample_df, tmp_path):
+    """Если изменились только описания, индекс строится заново."""
+    path = str(tmp_path / "index.pkl")
+    restore_state(DescriptionIndex, sample_df, path)
+    changed = sample_df.assign(Описание=["Пятерочка"] * len(sample_df))
+
+    index = restore_state(DescriptionIndex, changed, path)
+    assert index.search("магнит").tolist() == []
+    assert index.search("пятерочка").tolist() == list(range(len(sample_df)))
@@ -0,0 +1,135 @@
+import http.client
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from src.cache import cached_file_reader
+from src.server import create_server
+
+
+def write_export(path, descriptions: list) -> None:
+    """Сохраняет выгрузку с переводами по списку описаний."""
+    pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 16:44:00"] * len(descriptions),
+            "Номер карты": ["*7197"] * len(descriptions),
+            "Сумма операции": [-100.0] * len(descriptions),
+            "Категория": ["Переводы"] * len(descriptions),
+            "Описание": descriptions,
+        }
+    ).to_excel(path, index=False)
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Запускает сервер на свободном порту."""
+    file_path = tmp_path / "operations.xlsx"
+    write_export(file_path, ["Иван И."])
+    cache_dir = str(tmp_path / "cache")
+    with (
+        patch("src.queries.cached_file_reader", lambda path, columns: cached_file_reader(path, columns, cache_dir)),
+        patch("src.queries.AGGREGATES_PATH", str(tmp_path / "home_aggregates.json")),
+        patch("src.queries.CUBE_PATH", str(tmp_path / "spending_cube.json")),
+        patch("src.queries.SEARCH_INDEX_PATH", str(tmp_path / "search_index.pkl")),
+    ):
+        server = create_server(str(file_path), port=0, workers=4)
+        server.holder.check_interval = 0
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server, f"http://127.0.0.1:{server.server_address[1]}", file_path
+        server.shutdown()
+        server.server_close()
+
+
+def get_json(url: str) -> tuple[int, dict]:
+    """Выполняет GET-запрос и возвращает статус и JSON-ответ."""
+    try:
+        with urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_endpoints(server):
+    """Сервер отвечает на запросы отчетов."""
+    _, base_url, _ = server
+    status, body = get_json(f"{base_url}/p2p_transfers")
+    assert status == 200 and [row["Описание"] for row in body["result"]] == ["Иван И."]
+
+    status, body = get_json(f"{base_url}/category_report?category={quote('Переводы')}&date=31.12.2021")
+    assert status == 200 and len(body["result"]) == 1
+
+    assert get_json(f"{base_url}/category_report")[0] == 400
+    assert get_json(f"{base_url}/unknown")[0] == 404
+    assert get_json(f"{base_url}/health")[1]["rows"] == 1
+
+    status, body = get_json(f"{base_url}/cube_report?by=card")
+    assert status == 200 and body["result"] == [{"card": "7197", "spent": 100.0, "count": 1, "cashback": 0.0}]
+
+    status, body = get_json(f"{base_url}/search?query={quote('иван')}&mode=prefix")
+    assert status == 200 and [row["Описание"] for row in body["result"]] == ["Иван И."]
+
+
+def test_metrics_endpoint(server):
+    """Адрес /metrics отдает метрики в формате Prometheus."""
+    _, base_url, _ = server
+    with urlopen(f"{base_url}/metrics", timeout=5) as response:
+        assert response.status == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert response.read().decode("utf-8").startswith("# TYPE app_duration_seconds histogram")
+
+
+def test_concurrent_requests_and_cache(server):
+    """Параллельные запросы обслуживаются, повторный ответ берется из кэша."""
+    srv, base_url, _ = server
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_json(f"{base_url}/p2p_transfers")[0])) for _ in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [200] * 20
+
+    with patch("src.server.execute_query", side_effect=AssertionError("Запрос выполнен повторно")):
+        assert get_json(f"{base_url}/p2p_transfers")[0] == 200
+
+
+def test_keep_alive_connections_do_not_block_pool(server):
+    """Открытые keep-alive соединения сверх размера пула не задерживают новых клиентов."""
+    srv, base_url, _ = server
+    connections = []
+    for _ in range(6):
+        connection = http.client.HTTPConnection("127.0.0.1", srv.server_address[1], timeout=5)
+        connection.request("GET", "/health")
+        assert connection.getresponse().read()
+        connections.append(connection)
+
+    started = time.monotonic()
+    assert get_json(f"{base_url}/p2p_transfers")[0] == 200
+    assert time.monotonic() - started < 1
+    for connection in connections:
+        connection.close()
+
+
+def test_hot_reload(server):
+    """Изменение файла на диске подхватывается без перезапуска."""
+    srv, base_url, file_path = server
+    write_export(file_path, ["Иван И.", "Петр П."])
+    os.utime(file_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+    for _ in range(100):
+        if get_json(f"{base_url}/health")[1]["version"] == 1:
+            break
+        time.sleep(0.05)
+    status, body = get_json(f"{base_url}/p2p_transfers")
+    assert [row["Описание"] for row in body["result"]] == ["Иван И.", "Петр П."]
@@ -1,9 +1,11 @@
+import io
 import json
+import re
 
 import pandas as pd
 import pytest
 
-from src.services import find_p2p_transfers
+from src.services import find_p2p_transfers, match_unique, write_p2p_transfers
 
 
 @pytest.fixture
@@ -48,3 +50,43 @@ def test_find_p2p_transfers_invalid_data():
     """Тест, когда передаются некорректные данные."""
     result = find_p2p_transfers("невалидные данные")
     assert result is None
+
+
+def test_match_unique():
+    """Тест сопоставления по уникальным значениям с пропусками."""
+    values = pd.Series(["Иван И.", None, "Магазин", "Иван И.", "Петр П."])
+    pattern = re.compile(r"^[А-ЯЁ][а-яё]+\s[А-ЯЁ]\.$")
+    assert list(match_unique(values, pattern)) == [True, False, False, True, True]
+
+
+def test_match_unique_calls_pattern_once_per_value():
+    """Тест, что шаблон проверяется один раз для каждого уникального описания."""
+    calls = []
+
+    class CountingPattern:
+        def match(self, value):
+            calls.append(value)
+            return None
+
+    match_unique(pd.Series(["Иван И."] * 100 + ["Магазин"] * 50), CountingPattern())
+    assert sorted(calls) == ["Иван И.", "Магазин"]
+
+
+def test_write_p2p_transfers(sample_data, tmp_path):
+    """Тест записи переводов в формате JSON Lines."""
+    output = tmp_path / "p2p.jsonl"
+    assert write_p2p_transfers(sample_data, str(output), chunk_size=1) == 2
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == json.loads(find_p2p_transfers(sample_data))
+
+
+def test_write_p2p_transfers_stream(sample_data):
+    """Тест записи переводов в открытый поток."""
+    stream = io.StringIO()
+    assert write_p2p_transfers(sample_data, stream) == 2
+    assert stream.getvalue().count("\n") == 2
+
+
+def test_write_p2p_transfers_invalid_data():
+    """Тест, когда передаются некорректные данные."""
+    assert write_p2p_transfers("невалидные данные", io.StringIO()) is None
@@ -0,0 +1,101 @@
+import io
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.fx import FxRateTable
+from src.reports import spending_by_category
+from src.services import find_p2p_transfers, write_p2p_transfers
+from src.storage import SQLiteStore
+from src.utils import normalize_transactions
+from src.views import get_card_summary, get_top_transactions
+
+
+@pytest.fixture
+def sample_df():
+    """Тестовый DataFrame с транзакциями."""
+    return normalize_transactions(
+        pd.DataFrame(
+            {
+                "Дата операции": [
+                    "31.12.2021 16:44:00",
+                    "30.12.2021 12:00:00",
+                    "29.12.2021 10:00:00",
+                    "01.09.2021 09:00:00",
+                    "28.12.2021 08:00:00",
+                ],
+                "Номер карты": ["*7197", "*7197", "*5091", None, "*5091"],
+                "Статус": ["OK"] * 5,
+                "Сумма операции": [-100.5, -200.0, 300.0, -50.0, -10.0],
+                "Валюта операции": ["RUB"] * 5,
+                "Категория": ["Супермаркеты", "Переводы", "Пополнения", "Супермаркеты", "Переводы"],
+                "MCC": [5411.0, None, None, 5411.0, None],
+                "Описание": ["Колхоз", "Иван И.", "Пополнение", "Магнит", "ООО Ромашка"],
+            }
+        )
+    )
+
+
+@pytest.fixture
+def store(sample_df):
+    """Хранилище SQLite в памяти с загруженными транзакциями."""
+    store = SQLiteStore(":memory:")
+    store.load([sample_df.iloc[:2], sample_df.iloc[2:]])
+    yield store
+    store.close()
+
+
+def test_spending_by_category_pushdown(store, sample_df):
+    """Отчет по категории из базы совпадает с отчетом по DataFrame."""
+    expected = spending_by_category.__wrapped__(sample_df, "Супермаркеты", "31.12.2021")
+    result = spending_by_category.__wrapped__(store, "Супермаркеты", "31.12.2021")
+    assert list(result["Описание"]) == list(expected["Описание"])
+    assert list(result["Дата операции"]) == list(expected["Дата операции"])
+
+
+def test_find_p2p_transfers_pushdown(store, sample_df):
+    """Поиск переводов из базы совпадает с поиском по DataFrame."""
+    result = json.loads(find_p2p_transfers(store))
+    expected = json.loads(find_p2p_transfers(sample_df))
+    assert [(row["Дата операции"], row["Описание"]) for row in result] == [
+        (row["Дата операции"], row["Описание"]) for row in expected
+    ]
+
+
+def test_write_p2p_transfers_in_chunks(store, sample_df):
+    """Переводы из базы читаются и пишутся частями."""
+    store.load(pd.concat([sample_df] * 3, ignore_index=True))
+    chunks = list(store.iter_p2p_transfers(chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+
+    output = io.StringIO()
+    assert write_p2p_transfers(store, output, chunk_size=2) == 3
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == store.p2p_transfers()
+
+
+def test_home_page_aggregates_pushdown(store, sample_df):
+    """Сводка по картам и топ транзакций из базы совпадают с расчетом по DataFrame."""
+    assert get_card_summary(store) == get_card_summary(sample_df)
+    assert get_top_transactions(store) == get_top_transactions(sample_df)
+
+
+def test_load_replace_and_indexes(store, sample_df):
+    """Повторная загрузка заменяет строки, индексы создаются."""
+    assert store.load(sample_df) == len(sample_df)
+    assert len(store.query("SELECT * FROM transactions")) == len(sample_df)
+    indexes = set(store.query("SELECT name FROM sqlite_master WHERE type = 'index'")["name"])
+    assert {"idx_date", "idx_category_date", "idx_card", "idx_description"} <= indexes
+
+
+def test_load_converts_currency(sample_df):
+    """Суммы в валюте пересчитываются в рубли при загрузке в базу."""
+    table = FxRateTable(path=None)
+    table.rates = {"USD": {"2021-12-31": 80.0}}
+    df = sample_df.assign(**{"Валюта операции": ["USD"] + ["RUB"] * 4})
+    store = SQLiteStore(":memory:")
+    with patch("src.fx.get_fx_table", return_value=table):
+        store.load(df)
+    assert get_card_summary(store)[1]["total_spent"] == 8240.0
+    store.close()
@@ -0,0 +1,89 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.services import find_p2p_transfers
+from src.stream import (
+    iter_batches,
+    stream_card_summary,
+    stream_p2p_transfers,
+    stream_spending_by_category,
+    stream_top_transactions,
+)
+from src.utils import normalize_transactions
+from src.views import get_card_summary, get_top_transactions
+
+
+@pytest.fixture
+def sample_df():
+    """Создает тестовый DataFrame с транзакциями."""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "31.12.2021 16:44:00",
+                "30.12.2021 12:00:00",
+                "29.12.2021 10:00:00",
+                "28.12.2021 09:00:00",
+                "01.01.2021 09:00:00",
+            ],
+            "Номер карты": ["*7197", "*7197", "*5091", "*5091", "*4556"],
+            "Сумма операции": [-100.5, -200.0, 300.0, -50.0, -10.0],
+            "Категория": ["Супермаркеты", "Переводы", "Пополнения", "Супермаркеты", "Супермаркеты"],
+            "Описание": ["Колхоз", "Иван И.", "Пополнение", "Магнит", "Магнит"],
+        }
+    )
+
+
+@pytest.fixture
+def workbook(tmp_path, sample_df):
+    """Сохраняет тестовые транзакции в EXCEL-файл."""
+    file_path = tmp_path / "operations.xlsx"
+    sample_df.to_excel(file_path, index=False)
+    return str(file_path)
+
+
+def test_iter_batches(workbook, sample_df):
+    """Файл читается пакетами ограниченного размера."""
+    batches = list(iter_batches(workbook, batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    result = pd.concat(batches, ignore_index=True)
+    assert pd.api.types.is_datetime64_any_dtype(result["Дата операции"])
+    assert list(result["Номер карты"].astype(str)) == ["7197", "7197", "5091", "5091", "4556"]
+    assert list(result["Сумма операции"]) == list(sample_df["Сумма операции"])
+
+
+def test_iter_batches_decimal_comma_amounts(tmp_path):
+    """Суммы с десятичной запятой в текстовых ячейках разбираются так же, как при загрузке целиком."""
+    df = pd.DataFrame({"Дата операции": ["31.12.2021 16:44:00"] * 2, "Сумма операции": ["-100,50", 200.0]})
+    df.to_excel(tmp_path / "comma.xlsx", index=False)
+    batch = next(iter_batches(str(tmp_path / "comma.xlsx")))
+    assert batch["Сумма операции"].tolist() == [-100.5, 200.0]
+
+
+def test_iter_batches_columns(workbook):
+    """Считываются только запрошенные колонки."""
+    batch = next(iter_batches(workbook, columns=["Категория", "Сумма операции"]))
+    assert list(batch.columns) == ["Категория", "Сумма операции"]
+
+
+def test_stream_results_match_in_memory(workbook, sample_df):
+    """Потоковые функции возвращают тот же результат, что и обработка целого DataFrame."""
+    assert stream_card_summary(iter_batches(workbook, batch_size=2)) == get_card_summary(sample_df.copy())
+    assert stream_top_transactions(iter_batches(workbook, batch_size=2)) == get_top_transactions(sample_df)
+    assert json.loads(stream_p2p_transfers(iter_batches(workbook, batch_size=2))) == json.loads(
+        find_p2p_transfers(normalize_transactions(sample_df))
+    )
+
+
+def test_stream_spending_by_category(workbook, tmp_path, monkeypatch):
+    """Траты по категории собираются из нескольких пакетов, файл отчета не создается."""
+    monkeypatch.chdir(tmp_path)
+    result = stream_spending_by_category(iter_batches(workbook, batch_size=2), "Супермаркеты", "31.12.2021")
+    assert list(result["Описание"]) == ["Колхоз", "Магнит"]
+    assert not list(tmp_path.glob("report_*"))
+
+
+def test_stream_card_summary_invalid():
+    """Некорректные пакеты обрабатываются без исключения."""
+    assert stream_card_summary([pd.DataFrame({"x": [1]})]) == {}
@@ -1,6 +1,8 @@
 from unittest.mock import mock_open, patch
 
-from src.utils import load_user_settings
+import pandas as pd
+
+from src.utils import file_reader, load_user_settings, normalize_transactions, to_records
 
 
 @patch("builtins.open", new_callable=mock_open, read_data='[{"id": 1, "amount": 100}]')
@@ -31,3 +33,68 @@ def test_load_user_settings_invalid_json(mock_file):
     """
     result = load_user_settings("invalid.json")
     assert result == []
+
+
+def test_normalize_transactions():
+    """
+    Тестирует приведение транзакций к типизированному виду.
+    Исходный DataFrame не должен изменяться, повторная нормализация ничего не меняет.
+    """
+    df = pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 16:44:00", "30.12.2021 10:00:00"],
+            "Номер карты": ["*7197", "1234567890125091"],
+            "Сумма операции": ["-100,50", "200,00"],
+            "Категория": ["Супермаркеты", "Пополнения"],
+        }
+    )
+    original = df.copy()
+    result = normalize_transactions(df)
+
+    pd.testing.assert_frame_equal(df, original)
+    assert pd.api.types.is_datetime64_any_dtype(result["Дата операции"])
+    assert list(result["Сумма операции"]) == [-100.5, 200.0]
+    assert list(result["Номер карты"]) == ["7197", "5091"]
+    assert isinstance(result["Категория"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(normalize_transactions(result), result)
+
+
+def test_normalize_transactions_invalid_cells(caplog):
+    """
+    Тестирует, что некорректные даты и суммы заменяются на пустые значения, а не приводят к пустому DataFrame.
+    """
+    df = pd.DataFrame(
+        {
+            "Дата операции": ["31.12.2021 16:44:00", "не дата", "30.12.2021 10:00:00"],
+            "Сумма операции": ["-100,50", "200,00", "сто"],
+            "Кэшбэк": [None, "1", "2"],
+        }
+    )
+    result = normalize_transactions(df)
+
+    assert len(result) == 3
+    assert result["Дата операции"].isna().tolist() == [False, True, False]
+    assert result["Сумма операции"].tolist()[:2] == [-100.5, 200.0] and pd.isna(result["Сумма операции"][2])
+    assert result["Кэшбэк"].isna().tolist() == [True, False, False]
+    assert "'Дата операции': 1" in caplog.text and "'Сумма операции': 1" in caplog.text
+    assert "'Кэшбэк'" not in caplog.text
+
+
+def test_to_records_formats_dates():
+    """
+    Тестирует, что даты в записях форматируются как в исходном файле.
+    """
+    df = normalize_transactions(pd.DataFrame({"Дата операции": ["31.12.2021 16:44:00"]}))
+    assert to_records(df) == [{"Дата операции": "31.12.2021 16:44:00"}]
+
+
+def test_file_reader_columns(tmp_path):
+    """
+    Тестирует чтение только запрошенных колонок.
+    """
+    file_path = tmp_path / "operations.xlsx"
+    pd.DataFrame({"Категория": ["Супермаркеты"], "Описание": ["Колхоз"], "MCC": [5411]}).to_excel(
+        file_path, index=False
+    )
+    result = file_reader(str(file_path), ["Категория", "MCC", "Нет такой колонки"])
+    assert list(result.columns) == ["Категория", "MCC"]
@@ -1,9 +1,73 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
 
 import pandas as pd
 import pytest
 
-from src.views import get_card_summary, get_greeting, get_top_transactions, home_page
+from src.aggregates import HomePageAggregates
+from src.views import (
+    MarketDataCache,
+    get_card_summary,
+    get_currency_rates,
+    get_greeting,
+    get_market_data,
+    get_stock_prices,
+    get_top_transactions,
+    home_page,
+)
+
+STUB_PRICES = {"AAPL": 150.123, "AMZN": 3200.5, "MSFT": 300.0}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Обработчик локального HTTP-сервера, имитирующего API Layer и Marketstack."""
+
+    requests_log: list = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        StubHandler.requests_log.append((url.path, query))
+        if url.path == "/slow":
+            time.sleep(1)
+            body = {}
+        elif url.path == "/fixer/latest":
+            body = {"rates": {"USD": 0.0125, "EUR": 0.0115}}
+        else:
+            symbols = query["symbols"].split(",")
+            # Пакетный ответ содержит не все тикеры, чтобы проверить дозапрос по одному.
+            if len(symbols) > 1:
+                symbols = symbols[:-1]
+            body = {"data": [{"symbol": s, "close": STUB_PRICES[s]} for s in symbols if s in STUB_PRICES]}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Запускает локальный HTTP-сервер и направляет на него запросы к API."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    StubHandler.requests_log = []
+    with patch("src.views.FIXER_URL", f"{base_url}/fixer/latest"), patch(
+        "src.views.MARKETSTACK_URL", f"{base_url}/v1/eod"
+    ):
+        yield base_url
+    server.shutdown()
+    server.server_close()
 
 
 @pytest.fixture
@@ -46,3 +110,118 @@ def test_home_page(sample_df):
         result = home_page(sample_df)
         assert result is not None
         assert isinstance(result, str)
+
+
+def test_get_card_summary_does_not_mutate(sample_df):
+    """Проверяет, что сводка по картам не изменяет исходный DataFrame."""
+    original = sample_df.copy()
+    summary = get_card_summary(sample_df)
+    pd.testing.assert_frame_equal(sample_df, original)
+    assert [card["last_digits"] for card in summary] == ["3456", "7654"]
+
+
+def test_get_currency_rates(stub_server):
+    """Проверяет получение курсов валют одним запросом."""
+    rates = get_currency_rates(["USD", "EUR"])
+    assert rates == [{"currency": "USD", "rate": 80.0}, {"currency": "EUR", "rate": 86.96}]
+    assert StubHandler.requests_log == [("/fixer/latest", {"base": "RUB", "symbols": "USD,EUR"})]
+
+
+def test_get_stock_prices_batched(stub_server):
+    """Проверяет пакетный запрос цен и дозапрос недостающих тикеров."""
+    prices = get_stock_prices(["AAPL", "AMZN", "MSFT", "TSLA"])
+    assert prices == [
+        {"stock": "AAPL", "price": 150.12},
+        {"stock": "AMZN", "price": 3200.5},
+        {"stock": "MSFT", "price": 300.0},
+    ]
+    symbols = sorted(query["symbols"] for _, query in StubHandler.requests_log)
+    assert symbols == ["AAPL,AMZN,MSFT,TSLA", "TSLA"]
+
+
+def test_get_market_data_deadline(stub_server):
+    """Проверяет, что зависший запрос не задерживает ответ дольше общего срока."""
+    with patch("src.views.FIXER_URL", f"{stub_server}/slow"):
+        started = time.perf_counter()
+        rates, prices = get_market_data(["USD"], ["AAPL"], deadline=0.3, use_cache=False)
+    assert time.perf_counter() - started < 0.9
+    assert rates == {}
+    assert prices == [{"stock": "AAPL", "price": 150.12}]
+
+
+def test_market_data_cache_ttl_and_persistence(tmp_path):
+    """Проверяет попадания в кэш и восстановление записей после перезапуска."""
+    path = str(tmp_path / "market_cache.json")
+    cache = MarketDataCache(path=path, ttl={"fixer": 60})
+    loader_calls = []
+
+    def loader():
+        loader_calls.append(1)
+        return [{"currency": "USD", "rate": 80.0}]
+
+    key = ("fixer", "RUB", ("USD",))
+    assert cache.get(key, loader) == [{"currency": "USD", "rate": 80.0}]
+    assert cache.get(key, loader) == [{"currency": "USD", "rate": 80.0}]
+    assert len(loader_calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    restored = MarketDataCache(path=path, ttl={"fixer": 60})
+    assert restored.get(key, lambda: pytest.fail("Запрос к API вместо кэша")) == [{"currency": "USD", "rate": 80.0}]
+
+
+def test_market_data_cache_stale_while_revalidate(tmp_path):
+    """Проверяет, что устаревшая запись возвращается сразу и обновляется в фоне."""
+    cache = MarketDataCache(path=None, ttl={"marketstack": 0})
+    key = ("marketstack", "", ("AAPL",))
+    cache.get(key, lambda: [{"stock": "AAPL", "price": 1.0}])
+
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return [{"stock": "AAPL", "price": 2.0}]
+
+    assert cache.get(key, loader) == [{"stock": "AAPL", "price": 1.0}]
+    assert refreshed.wait(1)
+    for _ in range(100):
+        if cache.stats()["refreshes"]:
+            break
+        time.sleep(0.01)
+    assert cache.stats()["stale_hits"] == 1 and cache.stats()["refreshes"] == 1
+    assert cache._entries[key]["value"] == [{"stock": "AAPL", "price": 2.0}]
+
+
+def test_market_data_cache_lru_and_empty_values(tmp_path):
+    """Проверяет вытеснение старых записей и то, что пустые ответы не кэшируются."""
+    cache = MarketDataCache(path=None, max_entries=2)
+    for symbol in ("A", "B", "C"):
+        cache.get(("marketstack", "", (symbol,)), lambda: [{"stock": symbol}])
+    cache.get(("fixer", "RUB", ("USD",)), lambda: {})
+
+    assert list(cache._entries) == [("marketstack", "", ("B",)), ("marketstack", "", ("C",))]
+    assert cache.stats()["errors"] == 1
+
+
+def test_market_data_cache_key_ignores_symbol_order(tmp_path):
+    """Проверяет, что порядок и повторы символов не создают отдельных записей кэша."""
+    cache = MarketDataCache(path=None)
+    rates = [{"currency": "EUR", "rate": 90.0}, {"currency": "USD", "rate": 80.0}]
+    with (
+        patch("src.views.get_market_cache", return_value=cache),
+        patch("src.views.get_currency_rates", return_value=rates) as currency_rates,
+        patch("src.views.get_stock_prices", return_value=[{"stock": "AAPL", "price": 1.0}]),
+    ):
+        get_market_data(["USD", "EUR"], ["AAPL"])
+        assert get_market_data(["EUR", "USD", "USD"], ["AAPL", "AAPL"]) == (rates, [{"stock": "AAPL", "price": 1.0}])
+
+    currency_rates.assert_called_once_with(["EUR", "USD"])
+    assert set(cache._entries) == {("fixer", "RUB", ("EUR", "USD")), ("marketstack", "", ("AAPL",))}
+
+
+def test_home_page_from_aggregates(sample_df):
+    """Проверяет, что главная страница строится из переданных агрегатов."""
+    aggregates = HomePageAggregates.from_frame(sample_df)
+    with patch("src.views.load_user_settings", return_value={"user_currencies": [], "user_stocks": []}):
+        result = json.loads(home_page(pd.DataFrame(), aggregates))
+    assert result["cards"] == get_card_summary(sample_df)
+    assert result["top_transactions"] == get_top_transactions(sample_df)